@@ -17,6 +17,10 @@ def create_app(config_class: type[Config] | None = None) -> Flask:
     migrate.init_app(app, db)
     login_manager.init_app(app)
 
+    from . import cache, compression
+    cache.init_app(app)
+    compression.init_app(app)
+
     # Register blueprints
     from .auth.routes import auth_bp
     from .dashboard.routes import dashboard_bp
@@ -38,10 +42,21 @@ def create_app(config_class: type[Config] | None = None) -> Flask:
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(tasks_bp)
 
+    # CLI commands
+    from .commands import (bench_cli, compression_cli, habit_stats_cli, journal_fields_cli, journal_search_cli,
+                           query_plans_cli, score_months_cli)
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(compression_cli)
+    app.cli.add_command(habit_stats_cli)
+    app.cli.add_command(journal_fields_cli)
+    app.cli.add_command(journal_search_cli)
+    app.cli.add_command(query_plans_cli)
+    app.cli.add_command(score_months_cli)
+
     # Start scheduler
     with app.app_context():
         from .jobs import schedule_jobs
-        schedule_jobs()
+        schedule_jobs(app)
         if not scheduler.running:
             scheduler.start()
 
@@ -72,4 +87,24 @@ def create_app(config_class: type[Config] | None = None) -> Flask:
         """Simple status check without database dependency"""
         return {'status': 'ok', 'message': 'App is running', 'routes': 'available'}, 200
 
+    @app.route('/status/caches')
+    def cache_status():
+        """Per-process cache counters, for operators holding STATUS_TOKEN"""
+        import hmac
+        from flask import abort, request
+        from .analytics import analytics_cache
+        from .cache import fragment_cache
+        from .conditional import conditional_stats
+        from .journal_stats import journal_cache
+        token = app.config.get('STATUS_TOKEN')
+        given = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not token or not hmac.compare_digest(given.encode(), token.encode()):
+            abort(404)
+        return {
+            'fragment_cache': fragment_cache.stats(),
+            'analytics_cache': analytics_cache.stats(),
+            'journal_cache': journal_cache.stats(),
+            'conditional_get': conditional_stats.stats(),
+        }, 200
+
     return app
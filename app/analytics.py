@@ -0,0 +1,174 @@
+"""Habit completion analytics computed over a dense 0/1 day array.
+
+Logs are read once per request as date ordinals and expanded into one slot
+per day; rolling rates then come from a single cumulative sum. NumPy is used
+when installed, otherwise the same arithmetic runs in pure Python.
+"""
+from __future__ import annotations
+import json
+from datetime import date
+from itertools import accumulate
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from .cache import LRUCache
+from .extensions import db
+from .models import Habit, HabitLog, HabitStats, User
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+WINDOWS = (7, 30, 90)
+SERIES_DAYS = 90
+PERIOD_DAYS = 30
+WEEKDAYS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+
+# Results per habit are keyed by HabitStats.updated_at, which moves on every
+# log write for that habit; per-user results by the user's data_version.
+# Entries are stored as JSON text so the LRU's size accounting is accurate.
+analytics_cache = LRUCache(4 * 1024 * 1024)
+
+
+def load_ordinals(habit_ids: Iterable[int]) -> dict[int, list[int]]:
+    """Completed days per habit as sorted ``date.toordinal()`` values, in one query."""
+    result: dict[int, list[int]] = {habit_id: [] for habit_id in habit_ids}
+    if not result:
+        return result
+    rows = db.session.execute(
+        select(HabitLog.habit_id, HabitLog.log_date)
+        .where(HabitLog.habit_id.in_(list(result)), HabitLog.completed.is_(True))
+        .order_by(HabitLog.habit_id, HabitLog.log_date)
+    )
+    for habit_id, day in rows:
+        result[habit_id].append(day.toordinal())
+    return result
+
+
+def habit_range(habit: Habit, ordinals: list[int], today: date) -> tuple[int, int]:
+    """First and last day (as ordinals) the habit is measured over."""
+    begin = habit.start_date or (habit.created_at.date() if habit.created_at else today)
+    first = min([begin.toordinal()] + ordinals[:1])
+    last = min(today, habit.end_date) if habit.end_date else today
+    return first, max(first, last.toordinal())
+
+
+def _cumsum(ordinals: list[int], first: int, last: int):
+    """Cumulative completions with a leading 0: ``cs[i]`` = done days before day ``first + i``."""
+    n = last - first + 1
+    if np is not None:
+        done = np.zeros(n, dtype=np.int32)
+        idx = np.asarray(ordinals, dtype=np.int64) - first
+        done[idx[(idx >= 0) & (idx < n)]] = 1
+        return np.concatenate(([0], np.cumsum(done)))
+    done = [0] * n
+    for o in ordinals:
+        if first <= o <= last:
+            done[o - first] = 1
+    return [0] + list(accumulate(done))
+
+
+def _rolling(cs, window: int) -> list[float]:
+    """Completion rate of the trailing ``window`` days at every day (shorter at the start)."""
+    n = len(cs) - 1
+    if np is not None:
+        ends = np.arange(1, n + 1)
+        starts = np.maximum(ends - window, 0)
+        return np.round((cs[ends] - cs[starts]) / (ends - starts), 4).tolist()
+    return [round((cs[i] - cs[max(i - window, 0)]) / (i - max(i - window, 0)), 4) for i in range(1, n + 1)]
+
+
+def _weekday_profile(ordinals: list[int], first: int, last: int) -> list[dict]:
+    done = [0] * 7
+    total = [0] * 7
+    n = last - first + 1
+    weeks, rest = divmod(n, 7)
+    for offset in range(7):
+        # ordinal 1 (0001-01-01) is a Monday, so (ordinal % 7) is 0 on Sunday
+        total[(first + offset) % 7] += weeks + (1 if offset < rest else 0)
+    for o in ordinals:
+        if first <= o <= last:
+            done[o % 7] += 1
+    return [
+        {"weekday": WEEKDAYS[i], "done": done[i], "days": total[i],
+         "rate": round(done[i] / total[i], 4) if total[i] else 0.0}
+        for i in range(7)
+    ]
+
+
+def _periods(cs, first: int) -> tuple[Optional[dict], Optional[dict]]:
+    """Best and worst ``PERIOD_DAYS`` windows (whole history if shorter)."""
+    n = len(cs) - 1
+    window = min(PERIOD_DAYS, n)
+    if window <= 0:
+        return None, None
+    if np is not None:
+        sums = (cs[window:] - cs[:-window]).tolist()
+    else:
+        sums = [cs[i + window] - cs[i] for i in range(n - window + 1)]
+    best = max(range(len(sums)), key=sums.__getitem__)
+    worst = min(range(len(sums)), key=sums.__getitem__)
+
+    def period(i: int) -> dict:
+        return {
+            "start": date.fromordinal(first + i).isoformat(),
+            "end": date.fromordinal(first + i + window - 1).isoformat(),
+            "rate": round(sums[i] / window, 4),
+        }
+
+    return period(best), period(worst)
+
+
+def analyze(habit: Habit, ordinals: list[int], today: Optional[date] = None) -> dict:
+    today = today or date.today()
+    first, last = habit_range(habit, ordinals, today)
+    cs = _cumsum(ordinals, first, last)
+    days = last - first + 1
+    series_start = max(first, last - SERIES_DAYS + 1)
+    rolling = {}
+    for window in WINDOWS:
+        rates = _rolling(cs, window)
+        rolling[str(window)] = {"current": rates[-1], "series": rates[series_start - first:]}
+    best, worst = _periods(cs, first)
+    return {
+        "habit_id": habit.id,
+        "name": habit.name,
+        "from": date.fromordinal(first).isoformat(),
+        "to": date.fromordinal(last).isoformat(),
+        "series_from": date.fromordinal(series_start).isoformat(),
+        "days": days,
+        "completed": int(cs[-1]),
+        "completion_rate": round(int(cs[-1]) / days, 4),
+        "rolling": rolling,
+        "weekday_profile": _weekday_profile(ordinals, first, last),
+        "best_period": best,
+        "worst_period": worst,
+    }
+
+
+def habit_analytics_json(habit: Habit, today: Optional[date] = None) -> str:
+    today = today or date.today()
+    stamp = db.session.execute(
+        select(HabitStats.updated_at).where(HabitStats.habit_id == habit.id)
+    ).scalar_one_or_none()
+    key = ("habit", habit.id, stamp, habit.start_date, habit.end_date, today)
+    data = analytics_cache.get(key)
+    if data is None:
+        data = json.dumps(analyze(habit, load_ordinals([habit.id])[habit.id], today))
+        analytics_cache.set(key, data)
+    return data
+
+
+def user_analytics_json(user: User, today: Optional[date] = None) -> str:
+    today = today or date.today()
+    key = ("user", user.id, user.data_version, today)
+    data = analytics_cache.get(key)
+    if data is None:
+        habits = Habit.query.filter_by(user_id=user.id).order_by(Habit.id).all()
+        ordinals = load_ordinals(h.id for h in habits)
+        data = json.dumps({"habits": [analyze(h, ordinals[h.id], today) for h in habits]})
+        analytics_cache.set(key, data)
+    return data
@@ -1,40 +1,220 @@
-from datetime import date, timedelta
-from flask import jsonify, request
+import base64
+from datetime import date, datetime
+from flask import current_app, jsonify, request, abort
 from flask_login import login_required, current_user
+from sqlalchemy import select, delete, tuple_
 
+from .. import analytics, bitsets, journal_search, journal_stats
+from ..cache import bump_user_version
+from ..conditional import conditional
 from ..extensions import db
-from ..models import JournalEntry, TodoItem
+from ..models import Habit, HabitLog, JournalEntry, TodoItem
+from ..pagination import encode_cursor, decode_cursor
+from ..ranking import RankConflict, last_rank, move_between, neighbour_ids
+from ..sqlutil import dialect_insert
+from ..streaks import refresh_user_habit_stats
 from . import api_bp
 
 
+BULK_LOG_LIMIT = 1000
+
+
+TODO_ORDER = (TodoItem.is_done, TodoItem.position, TodoItem.created_at, TodoItem.id)
+
+
+def todo_cursor(item) -> str:
+    return encode_cursor(item.is_done, item.position, item.created_at, item.id)
+
+
 @api_bp.get("/journal/heatmap")
 @login_required
+@conditional(JournalEntry)
 def journal_heatmap():
     # Return counts per day for last 365 days
-    start = date.today() - timedelta(days=365)
-    entries = (
-        JournalEntry.query
-        .filter(JournalEntry.user_id == current_user.id, JournalEntry.entry_date >= start)
-        .all()
-    )
-    counts = {}
-    for e in entries:
-        key = e.entry_date.isoformat()
-        counts[key] = counts.get(key, 0) + 1
-    data = [{"date": k, "count": v} for k, v in sorted(counts.items())]
+    return current_app.response_class(journal_stats.heatmap_json(current_user), mimetype="application/json")
+
+
+@api_bp.get("/journal/stats")
+@login_required
+@conditional(JournalEntry)
+def journal_writing_stats():
+    # Entries, words and characters per month of ?year= (default: this year)
+    year = request.args.get("year", type=int) or date.today().year
+    if not 1 <= year <= 9999:
+        return jsonify({"error": "Invalid year"}), 400
+    return current_app.response_class(journal_stats.writing_stats_json(current_user, year), mimetype="application/json")
+
+
+@api_bp.get("/journal/on-this-day")
+@login_required
+@conditional(JournalEntry)
+def journal_on_this_day():
+    # Entries from today's month and day in earlier years, by the user's local date
+    return current_app.response_class(journal_stats.on_this_day_json(current_user), mimetype="application/json")
+
+
+@api_bp.get("/journal/search")
+@login_required
+def search_journal():
+    # ?q= words (last one as a prefix), optional ?from=&to= ISO dates; snippets are HTML with <mark>
+    try:
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else None
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "Invalid date"}), 400
+    if not journal_search.has_index(db.session.connection()):
+        return jsonify({"error": "Search index is not built; run flask journal-search rebuild"}), 503
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    results = journal_search.search(current_user.id, request.args.get("q", ""), start, end, limit)
+    return jsonify({"results": results})
+
+
+@api_bp.get("/todos")
+@login_required
+@conditional(TodoItem)
+def list_todos():
+    # Keyset pagination over (is_done, position, created_at, id), served by ix_todo_items_user_kind_order
+    kind = request.args.get("kind", "todo")
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    q = TodoItem.query.filter_by(user_id=current_user.id, kind=kind)
+    cursor = request.args.get("cursor")
+    if cursor:
+        is_done, position, created_at, item_id = decode_cursor(cursor, 4)
+        try:
+            after = (bool(is_done), str(position), datetime.fromisoformat(created_at), int(item_id))
+        except (TypeError, ValueError):
+            abort(400, "Invalid cursor")
+        q = q.filter(tuple_(*TODO_ORDER) > tuple_(*after))
+    items = q.order_by(*TODO_ORDER).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    return jsonify({
+        "items": [{"id": t.id, "label": t.label, "is_done": t.is_done} for t in items],
+        "next_cursor": todo_cursor(items[-1]) if has_more else None,
+    })
+
+
+@api_bp.get("/habits/<int:habit_id>/history")
+@login_required
+@conditional(Habit, HabitLog)
+def habit_history(habit_id: int):
+    # Year heatmap as a base64 bitmap (bit N = day-of-year N + 1) plus bit-op streaks/rates
+    habit = Habit.query.filter_by(id=habit_id, user_id=current_user.id).first_or_404()
+    year = request.args.get("year", type=int) or date.today().year
+    if not 1 <= year <= 9999:
+        return jsonify({"error": "Invalid year"}), 400
+    data = bitsets.habit_history(habit, year)
+    data["bits"] = base64.b64encode(data["bits"]).decode()
     return jsonify(data)
 
 
+@api_bp.get("/habits/<int:habit_id>/analytics")
+@login_required
+@conditional(Habit, HabitLog)
+def habit_analytics(habit_id: int):
+    # 7/30/90-day rolling completion rates, weekday profile and best/worst 30-day periods
+    habit = Habit.query.filter_by(id=habit_id, user_id=current_user.id).first_or_404()
+    return current_app.response_class(analytics.habit_analytics_json(habit), mimetype="application/json")
+
+
+@api_bp.get("/habits/analytics")
+@login_required
+@conditional(Habit, HabitLog)
+def habits_analytics():
+    return current_app.response_class(analytics.user_analytics_json(current_user), mimetype="application/json")
+
+
+@api_bp.post("/habits/logs/bulk")
+@login_required
+def bulk_habit_logs():
+    """Backfill check-ins: {"entries": [{"habit_id", "date", "completed"}, ...]}.
+
+    Completed entries go in as one INSERT ... ON CONFLICT against
+    uq_habit_log_once_per_day, uncompleted ones as one DELETE. Entries for
+    unknown habits, bad dates and no-op changes count as skipped.
+    """
+    payload = request.get_json(force=True, silent=True) or {}
+    entries = payload.get("entries") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        return jsonify({"error": "entries must be a list"}), 400
+    if len(entries) > BULK_LOG_LIMIT:
+        return jsonify({"error": f"at most {BULK_LOG_LIMIT} entries per request"}), 400
+
+    owned = set(db.session.execute(select(Habit.id).where(Habit.user_id == current_user.id)).scalars())
+    wanted = {}  # (habit_id, day) -> completed; the last entry for a day wins
+    for entry in entries:
+        try:
+            habit_id = int(entry["habit_id"])
+            day = date.fromisoformat(entry["date"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if habit_id in owned:
+            wanted[(habit_id, day)] = bool(entry.get("completed", True))
+
+    now = datetime.utcnow()
+    add = [key for key, completed in wanted.items() if completed]
+    remove = [key for key, completed in wanted.items() if not completed]
+    applied = 0
+    if add:
+        stmt = dialect_insert(db.session, HabitLog).values([
+            {"user_id": current_user.id, "habit_id": h, "log_date": d, "completed": True, "created_at": now}
+            for h, d in add
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "habit_id", "log_date"],
+            set_={"completed": True},
+            where=HabitLog.completed.is_(False),
+        )
+        applied += db.session.execute(stmt).rowcount
+    if remove:
+        stmt = (
+            delete(HabitLog)
+            .where(HabitLog.user_id == current_user.id, tuple_(HabitLog.habit_id, HabitLog.log_date).in_(remove))
+            .execution_options(synchronize_session=False)
+        )
+        applied += db.session.execute(stmt).rowcount
+
+    if applied:
+        if bitsets.enabled():
+            for (habit_id, day), completed in wanted.items():
+                bitsets.set_day(current_user.id, habit_id, day, completed)
+        refresh_user_habit_stats(current_user.id, {h for h, _ in wanted})
+        # Core statements bypass the flush hooks that normally invalidate caches
+        bump_user_version(current_user.id)
+    db.session.commit()
+    return jsonify({"applied": applied, "skipped": len(entries) - applied})
+
+
 @api_bp.post("/todos")
 @login_required
 def create_todo():
     payload = request.get_json(force=True)
-    item = TodoItem(user_id=current_user.id, label=payload.get("label", ""), kind=payload.get("kind", "todo"))
+    kind = payload.get("kind", "todo")
+    position = last_rank(TodoItem, TodoItem.user_id == current_user.id, TodoItem.kind == kind)
+    item = TodoItem(user_id=current_user.id, label=payload.get("label", ""), kind=kind, position=position)
     db.session.add(item)
     db.session.commit()
     return jsonify({"id": item.id})
 
 
+@api_bp.post("/todos/<int:item_id>/move")
+@login_required
+def move_todo(item_id: int):
+    # {"before_id": id|null, "after_id": id|null}; rewrites only this item's rank
+    item = TodoItem.query.filter_by(id=item_id, user_id=current_user.id).first_or_404()
+    try:
+        before_id, after_id = neighbour_ids(request.get_json(silent=True) or {})
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    try:
+        move_between(item, (TodoItem.user_id == current_user.id, TodoItem.kind == item.kind), before_id, after_id)
+    except RankConflict as exc:
+        db.session.rollback()
+        return jsonify({"error": str(exc)}), 409
+    db.session.commit()
+    return jsonify({"ok": True, "position": item.position})
+
+
 @api_bp.post("/todos/<int:item_id>/toggle")
 @login_required
 def toggle_todo(item_id: int):
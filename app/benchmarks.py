@@ -0,0 +1,137 @@
+"""Micro-benchmarks for hot queries, run against a throwaway in-memory SQLite.
+
+``flask bench journal-list`` fills one user with synthetic journal entries
+and times the journal list at increasing page depths, OFFSET against the
+keyset query the route uses. ``flask bench compression`` stores a synthetic
+Quill HTML corpus with each content codec and reports size and latency.
+"""
+from __future__ import annotations
+import random
+import time
+from datetime import date, timedelta
+from typing import Callable
+
+from sqlalchemy import (Column, Integer, LargeBinary, MetaData, Table, Text, cast, create_engine, func, insert, select,
+                        type_coerce)
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.pool import StaticPool
+
+from .compression import CompressedText, available_codecs
+from .extensions import db
+from .models import JournalEntry, User
+
+
+def _scratch_session() -> Session:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    return Session(engine)
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Fastest of ``repeat`` runs in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench_journal_list(entries: int = 10_000, per_page: int = 100, depths=(1, 10, 50, 99),
+                       repeat: int = 20) -> list[dict]:
+    """Milliseconds per page for OFFSET and keyset pagination at each page depth."""
+    from .journal.routes import listing_query
+
+    session = _scratch_session()
+    session.execute(insert(User), [{"id": 1, "email": "bench@example.com", "password_hash": "-"}])
+    rng = random.Random(0)
+    words = "morning run coffee notes meeting walk read plan sleep idea".split()
+    start = date.today() - timedelta(days=entries)
+    days = [start + timedelta(days=i) for i in range(entries)]
+    session.execute(insert(JournalEntry), [
+        {"user_id": 1, "entry_date": day, "entry_month": day.month, "entry_day": day.day, "title": f"Day {i}",
+         "excerpt": " ".join(rng.choices(words, k=30)),
+         "content": "<p>" + " ".join(rng.choices(words, k=400)) + "</p>"}
+        for i, day in enumerate(days)
+    ])
+    session.commit()
+
+    def offset_page(page):
+        return session.execute(
+            select(JournalEntry)
+            .options(load_only(JournalEntry.id, JournalEntry.entry_date, JournalEntry.title, JournalEntry.excerpt))
+            .where(JournalEntry.user_id == 1)
+            .order_by(JournalEntry.entry_date.desc(), JournalEntry.id.desc())
+            .offset((page - 1) * per_page).limit(per_page)
+        ).scalars().all()
+
+    # The keyset cursor for page N is the last row of page N-1
+    keys = session.execute(
+        select(JournalEntry.entry_date, JournalEntry.id)
+        .order_by(JournalEntry.entry_date.desc(), JournalEntry.id.desc())
+    ).all()
+    results = []
+    for page in (p for p in depths if (p - 1) * per_page < entries):
+        after = tuple(keys[(page - 1) * per_page - 1]) if page > 1 else None
+        results.append({
+            "page": page,
+            "offset_ms": _best_of(lambda: offset_page(page), repeat),
+            "keyset_ms": _best_of(lambda: session.execute(listing_query(1, after, per_page)).scalars().all(), repeat),
+        })
+        session.expunge_all()
+    session.close()
+    return results
+
+
+def _quill_corpus(entries: int, rng: random.Random) -> list[str]:
+    """HTML shaped like the editor's output: paragraphs, lists, inline marks, 0.3-6 KB each."""
+    words = ("today felt long but good went for a run then worked on the project with coffee read "
+             "two chapters called mom planned tomorrow gym skipped meeting notes idea garden").split()
+
+    def sentence():
+        text = " ".join(rng.choices(words, k=rng.randint(6, 18)))
+        if rng.random() < 0.3:
+            text = text.replace(" ", " <strong>", 1) + "</strong>"
+        return text.capitalize() + "."
+
+    corpus = []
+    for _ in range(entries):
+        blocks = []
+        for _ in range(rng.randint(2, 30)):
+            if rng.random() < 0.2:
+                blocks.append("<ul>" + "".join(f"<li>{sentence()}</li>" for _ in range(rng.randint(2, 5))) + "</ul>")
+            else:
+                blocks.append("<p>" + " ".join(sentence() for _ in range(rng.randint(1, 4))) + "</p>")
+        corpus.append("".join(blocks))
+    return corpus
+
+
+def bench_compression(entries: int = 50_000, point_reads: int = 2_000) -> list[dict]:
+    """Stored bytes, bulk write/read seconds and point-read microseconds per codec."""
+    rng = random.Random(0)
+    corpus = _quill_corpus(entries, rng)
+    ids = [rng.randint(1, entries) for _ in range(point_reads)]
+    results = []
+    for codec in available_codecs():
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        docs = Table("bench_docs", MetaData(), Column("id", Integer, primary_key=True),
+                     Column("content", CompressedText(codec)))
+        docs.metadata.create_all(engine)
+        with engine.begin() as conn:
+            started = time.perf_counter()
+            conn.execute(insert(docs), [{"id": i + 1, "content": html} for i, html in enumerate(corpus)])
+            write_s = time.perf_counter() - started
+            stored = conn.execute(
+                select(func.sum(func.length(cast(type_coerce(docs.c.content, Text), LargeBinary))))
+            ).scalar()
+            started = time.perf_counter()
+            conn.execute(select(docs.c.content)).scalars().all()
+            read_s = time.perf_counter() - started
+            started = time.perf_counter()
+            for i in ids:
+                conn.execute(select(docs.c.content).where(docs.c.id == i)).scalar()
+            point_us = (time.perf_counter() - started) / len(ids) * 1e6
+        engine.dispose()
+        results.append({"codec": codec, "stored_bytes": stored, "write_s": write_s, "read_s": read_s,
+                        "point_read_us": point_us})
+    return results
@@ -0,0 +1,151 @@
+"""Optional compact habit history: one 46-byte completion bitmap per habit per year.
+
+Enabled with ``HABIT_BITSETS``. Year grids, streaks and completion rates are
+then computed with integer bit operations over a handful of rows instead of
+one ``habit_logs`` row per completed day. When disabled, the same functions
+run over a bitmap assembled from ``habit_logs``.
+"""
+from __future__ import annotations
+from datetime import date
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from .extensions import db
+from .models import Habit, HabitLog, HabitYearBits
+
+
+YEAR_BYTES = 46
+
+
+def enabled() -> bool:
+    return bool(current_app.config.get("HABIT_BITSETS"))
+
+
+def _day_index(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def _to_int(raw: Optional[bytes]) -> int:
+    return int.from_bytes(raw, "little") if raw else 0
+
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes(YEAR_BYTES, "little")
+
+
+def set_day(user_id: int, habit_id: int, day: date, completed: bool) -> None:
+    """Mirror a HabitLog write into the habit's bitmap for that year (same transaction)."""
+    row = db.session.get(HabitYearBits, (habit_id, day.year))
+    if row is None:
+        row = HabitYearBits(habit_id=habit_id, year=day.year, user_id=user_id, bits=_to_bytes(0))
+        db.session.add(row)
+    bit = 1 << _day_index(day)
+    bits = _to_int(row.bits)
+    row.bits = _to_bytes(bits | bit if completed else bits & ~bit)
+
+
+def years_bits(habit_id: int, first_year: int, last_year: int) -> dict[int, int]:
+    """Bitmaps of completed days for each year in ``first_year..last_year``, in one query."""
+    years = range(first_year, last_year + 1)
+    found = dict.fromkeys(years, 0)
+    if enabled():
+        rows = db.session.execute(
+            select(HabitYearBits.year, HabitYearBits.bits)
+            .where(HabitYearBits.habit_id == habit_id, HabitYearBits.year.in_(list(years)))
+        )
+        found.update((year, _to_int(raw)) for year, raw in rows)
+        return found
+    days = db.session.execute(
+        select(HabitLog.log_date).where(
+            HabitLog.habit_id == habit_id,
+            HabitLog.completed.is_(True),
+            HabitLog.log_date >= date(first_year, 1, 1),
+            HabitLog.log_date <= date(last_year, 12, 31),
+        )
+    ).scalars()
+    for day in days:
+        found[day.year] |= 1 << _day_index(day)
+    return found
+
+
+def year_bits(habit_id: int, year: int) -> int:
+    """Bitmap of completed days in ``year``."""
+    return years_bits(habit_id, year, year)[year]
+
+
+def history_bits(habit_id: int, start: date, end: date) -> int:
+    """Bitmap over ``start..end`` inclusive, bit 0 being ``start``.
+
+    Yearly bitmaps are spliced together at their real lengths so a run
+    crossing New Year stays contiguous.
+    """
+    bits = 0
+    for year, year_value in years_bits(habit_id, start.year, end.year).items():
+        offset = (date(year, 1, 1) - start).days
+        bits |= (year_value << offset) if offset >= 0 else (year_value >> -offset)
+    return bits & ((1 << ((end - start).days + 1)) - 1)
+
+
+def run_ending_at(bits: int, index: int) -> int:
+    """Length of the run of set bits ending at ``index`` (0 if that bit is clear)."""
+    mask = (1 << (index + 1)) - 1
+    gaps = ~bits & mask
+    if not gaps:
+        return index + 1
+    return index - gaps.bit_length() + 1
+
+
+def longest_run(bits: int) -> int:
+    """Longest run of set bits: each ``x & (x >> 1)`` shortens every run by one."""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+
+def completion_rate(bits: int, days: int) -> float:
+    return round(bits.bit_count() / days, 4) if days > 0 else 0.0
+
+
+def habit_history(habit: Habit, year: int, today: Optional[date] = None) -> dict:
+    """Heatmap, streaks and completion rate for one habit-year, all from bitmaps."""
+    today = today or date.today()
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    bits = year_bits(habit.id, year)
+    elapsed = (min(today, last) - first).days + 1 if today >= first else 0
+
+    # The current streak may have started in an earlier year
+    since = date(habit.created_at.year if habit.created_at else year, 1, 1)
+    full = history_bits(habit.id, min(since, first), today) if today >= first else 0
+    current = run_ending_at(full, (today - min(since, first)).days) if full else 0
+
+    return {
+        "year": year,
+        "days": (last - first).days + 1,
+        "bits": _to_bytes(bits),
+        "completed": bits.bit_count(),
+        "completion_rate": completion_rate(bits, elapsed),
+        "current_streak": current,
+        "longest_streak": longest_run(bits),
+    }
+
+
+def rebuild_year_bits() -> int:
+    """Regenerate habit_year_bits from habit_logs; returns the number of rows written."""
+    HabitYearBits.query.delete()
+    rows: dict[tuple[int, int], list] = {}
+    logs = db.session.execute(
+        select(HabitLog.habit_id, HabitLog.user_id, HabitLog.log_date).where(HabitLog.completed.is_(True))
+    )
+    for habit_id, user_id, day in logs:
+        entry = rows.setdefault((habit_id, day.year), [user_id, 0])
+        entry[1] |= 1 << _day_index(day)
+    db.session.add_all(
+        HabitYearBits(habit_id=habit_id, year=year, user_id=user_id, bits=_to_bytes(bits))
+        for (habit_id, year), (user_id, bits) in rows.items()
+    )
+    db.session.commit()
+    return len(rows)
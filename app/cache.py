@@ -0,0 +1,147 @@
+"""In-process caches and the per-user data version used to key them.
+
+Every user row carries a ``data_version`` that is bumped in the same
+transaction as any write to the tables the dashboard renders, so cache keys
+that include it go stale everywhere at once, across all worker processes,
+even though each process keeps its own LRU.
+"""
+from __future__ import annotations
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+
+from flask import Flask
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import User, Habit, HabitLog, HabitStats, TodoItem, JournalEntry, DailyScore
+
+
+# Models whose rows feed the cached dashboard panels.
+WATCHED_MODELS = (Habit, HabitLog, HabitStats, TodoItem, JournalEntry, DailyScore)
+
+# Cached fragments never contain a real CSRF token (tokens are per session,
+# fragments are per user); this slot is swapped for one when serving.
+CSRF_SLOT = "__csrf_slot__"
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by the approximate size of its values."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._data[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._size -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class NullCache(LRUCache):
+    """Backend that stores nothing; every lookup is a miss."""
+
+    def set(self, key: Hashable, value: Any) -> None:
+        return None
+
+
+fragment_cache: LRUCache = LRUCache()
+
+
+def init_app(app: Flask) -> None:
+    global fragment_cache
+    backend = app.config.get("FRAGMENT_CACHE_BACKEND", "memory")
+    max_bytes = app.config.get("FRAGMENT_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+    fragment_cache = NullCache(max_bytes) if backend == "null" else LRUCache(max_bytes)
+
+
+def fragment_key(user: User, name: str, today: date) -> tuple:
+    return ("fragment", user.id, user.data_version, today.isoformat(), name)
+
+
+def cached_fragments(user: User, today: date, names: tuple[str, ...],
+                     render: Callable[[list[str]], dict[str, str]]) -> dict[str, Markup]:
+    """Return rendered panels by name, calling ``render(missing_names)`` only on a miss."""
+    found = {name: fragment_cache.get(fragment_key(user, name, today)) for name in names}
+    missing = [name for name, html in found.items() if html is None]
+    if missing:
+        for name, html in render(missing).items():
+            fragment_cache.set(fragment_key(user, name, today), html)
+            found[name] = html
+    token = generate_csrf()
+    return {name: Markup(html.replace(CSRF_SLOT, token)) for name, html in found.items()}
+
+
+def bump_user_version(*user_ids: int) -> None:
+    """Invalidate cached data for users written by Core statements that bypass the ORM flush."""
+    ids = sorted({uid for uid in user_ids if uid is not None})
+    if ids:
+        db.session.execute(update(User).where(User.id.in_(ids)).values(data_version=User.data_version + 1))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions_after_flush(session, flush_context):
+    touched = {
+        obj.user_id
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, WATCHED_MODELS) and (obj not in session.dirty or session.is_modified(obj))
+    }
+    pending = touched - session.info.setdefault("versioned_users", set())
+    if not pending:
+        return
+    session.info["versioned_users"] |= pending
+    session.connection().execute(
+        update(User).where(User.id.in_(sorted(pending))).values(data_version=User.data_version + 1)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_versioned_users(session):
+    session.info.pop("versioned_users", None)
@@ -0,0 +1,112 @@
+import click
+from flask.cli import AppGroup
+
+from .benchmarks import bench_compression, bench_journal_list
+from .bitsets import rebuild_year_bits
+from .compression import CODECS, recompress_content
+from .journal_fields import backfill_derived_fields
+from .journal_search import rebuild_search_index
+from .query_plans import check_plans
+from .score_rollup import rebuild_score_months
+from .streaks import rebuild_habit_stats
+
+
+habit_stats_cli = AppGroup("habit-stats", help="Maintain the materialized habit_stats table.")
+query_plans_cli = AppGroup("query-plans", help="Guard the hot queries against full table scans.")
+score_months_cli = AppGroup("score-months", help="Maintain the daily_score_months rollup.")
+journal_search_cli = AppGroup("journal-search", help="Maintain the journal full-text search index.")
+journal_fields_cli = AppGroup("journal-fields", help="Maintain the columns derived from journal content.")
+compression_cli = AppGroup("compression", help="Maintain compressed journal and subpage content.")
+bench_cli = AppGroup("bench", help="Time hot queries against synthetic data in an in-memory SQLite.")
+
+
+@habit_stats_cli.command("rebuild")
+def rebuild_habit_stats_command():
+    """Regenerate habit_stats from habit_logs."""
+    checked, drifted = rebuild_habit_stats()
+    click.echo(f"Rebuilt habit_stats: {checked} habits, {drifted} rows corrected.")
+
+
+@habit_stats_cli.command("check")
+def check_habit_stats_command():
+    """Report drift between habit_stats and habit_logs without writing."""
+    checked, drifted = rebuild_habit_stats(check_only=True)
+    click.echo(f"Checked {checked} habits, {drifted} drifted.")
+    if drifted:
+        raise SystemExit(1)
+
+
+@habit_stats_cli.command("rebuild-bits")
+def rebuild_year_bits_command():
+    """Regenerate habit_year_bits from habit_logs."""
+    written = rebuild_year_bits()
+    click.echo(f"Rebuilt habit_year_bits: {written} habit-years.")
+
+
+@score_months_cli.command("rebuild")
+def rebuild_score_months_command():
+    """Regenerate daily_score_months from daily_scores."""
+    written = rebuild_score_months()
+    click.echo(f"Rebuilt daily_score_months: {written} months.")
+
+
+@journal_search_cli.command("rebuild")
+def rebuild_search_index_command():
+    """Create the search table if missing and reindex every journal entry."""
+    indexed = rebuild_search_index()
+    click.echo(f"Indexed {indexed} journal entries.")
+
+
+@query_plans_cli.command("check")
+@click.option("--verbose", "-v", is_flag=True, help="Print every plan, not only failures.")
+def check_query_plans_command(verbose):
+    """EXPLAIN each hot route query; exit 1 if any scans a whole table."""
+    failed = 0
+    for result in check_plans():
+        status = "FULL SCAN" if result.full_scans else "ok"
+        click.echo(f"{status:9} {result.name}")
+        if result.full_scans or verbose:
+            for line in result.plan:
+                click.echo(f"          {line}")
+        failed += bool(result.full_scans)
+    if failed:
+        raise SystemExit(1)
+
+
+@journal_fields_cli.command("backfill")
+@click.option("--all", "recompute_all", is_flag=True, help="Recompute every entry, not only those missing a value.")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per transaction.")
+def backfill_journal_fields_command(recompute_all, batch_size):
+    """Fill excerpt, plaintext_len and word_count from the stored HTML."""
+    written = backfill_derived_fields(batch_size, only_missing=not recompute_all)
+    click.echo(f"Updated {written} journal entries.")
+
+
+@compression_cli.command("recompress")
+@click.option("--codec", type=click.Choice(CODECS), default=None, help="Target codec [default: CONTENT_COMPRESSION].")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per transaction.")
+def recompress_content_command(codec, batch_size):
+    """Rewrite stored journal and subpage HTML with the target codec."""
+    totals = recompress_content(codec, batch_size)
+    click.echo(f"Rewrote {totals['rewritten']} of {totals['rows']} rows: "
+               f"{totals['bytes_before']} -> {totals['bytes_after']} bytes.")
+
+
+@bench_cli.command("journal-list")
+@click.option("--entries", default=10_000, show_default=True, help="Synthetic entries for the one user.")
+@click.option("--repeat", default=20, show_default=True, help="Runs per page; the fastest is reported.")
+def bench_journal_list_command(entries, repeat):
+    """Journal list latency by page depth: OFFSET vs keyset."""
+    click.echo(f"{'page':>5} {'offset ms':>10} {'keyset ms':>10}")
+    for row in bench_journal_list(entries=entries, repeat=repeat):
+        click.echo(f"{row['page']:>5} {row['offset_ms']:>10.2f} {row['keyset_ms']:>10.2f}")
+
+
+@bench_cli.command("compression")
+@click.option("--entries", default=50_000, show_default=True, help="Synthetic HTML documents.")
+def bench_compression_command(entries):
+    """Stored size and read/write latency of content per codec."""
+    click.echo(f"{'codec':>6} {'stored MB':>10} {'write s':>8} {'read s':>8} {'point us':>9}")
+    for row in bench_compression(entries=entries):
+        click.echo(f"{row['codec']:>6} {row['stored_bytes'] / 1e6:>10.2f} {row['write_s']:>8.2f} "
+                   f"{row['read_s']:>8.2f} {row['point_read_us']:>9.1f}")
@@ -0,0 +1,146 @@
+"""Compression at rest for the rich HTML columns.
+
+``CompressedText`` keeps the columns as ordinary text, so nothing about the
+schema depends on the setting and plain rows are exactly what they were.
+Compressed values are the codec output in base64 behind a two-character
+header, U+0001 plus a codec id, which never begins HTML; anything else is
+read back as-is, so rows written under any setting stay readable. Writes use
+the codec named by ``CONTENT_COMPRESSION`` ("none", "zlib" or "zstd");
+``flask compression recompress`` rewrites existing rows to it.
+"""
+from __future__ import annotations
+import base64
+import logging
+import zlib
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+CODECS = ("none", "zlib", "zstd")
+HEADERS = {"zlib": "\x01z", "zstd": "\x01s"}
+MIN_COMPRESS_BYTES = 256  # below this the header, codec framing and base64 rarely pay off
+
+_write_codec = "none"
+
+
+def init_app(app: Flask) -> None:
+    global _write_codec
+    _write_codec = resolve_codec(app.config.get("CONTENT_COMPRESSION", "none"))
+
+
+def available_codecs() -> list[str]:
+    return [name for name in CODECS if name != "zstd" or zstandard is not None]
+
+
+def resolve_codec(name: str) -> str:
+    name = (name or "none").lower()
+    if name not in CODECS:
+        raise ValueError(f"CONTENT_COMPRESSION must be one of {', '.join(CODECS)}, not {name!r}")
+    if name == "zstd" and zstandard is None:
+        logger.warning("CONTENT_COMPRESSION=zstd but the zstandard package is not installed; using zlib")
+        return "zlib"
+    return name
+
+
+def codec_of(raw: str) -> str:
+    """Codec a stored value was written with."""
+    for name, header in HEADERS.items():
+        if raw.startswith(header):
+            return name
+    return "none"
+
+
+def compress(text: str, codec: str) -> str:
+    data = text.encode("utf-8")
+    if codec == "none" or len(data) < MIN_COMPRESS_BYTES:
+        return text
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor(level=6).compress(data)
+    else:
+        packed = zlib.compress(data, 6)
+    stored = HEADERS[codec] + base64.b64encode(packed).decode("ascii")
+    return stored if len(stored) < len(data) else text
+
+
+def decompress(raw: str) -> str:
+    codec = codec_of(raw)
+    if codec == "none":
+        return raw
+    packed = base64.b64decode(raw[2:])
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Content is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(packed).decode("utf-8")
+    return zlib.decompress(packed).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed; ``codec`` overrides the configured one (benchmarks)."""
+
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, codec: Optional[str] = None):
+        super().__init__()
+        self.codec = codec
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress(value, self.codec or _write_codec)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress(value)
+
+
+def recompress_content(codec: Optional[str] = None, batch_size: int = 500) -> dict:
+    """Rewrite stored journal and subpage content with ``codec`` (default: the configured one).
+
+    Works in id order, one commit per batch, so it can run against a live
+    database and be interrupted and resumed. Rows already in the target
+    format are skipped; ``updated_at`` is left alone, as the text is unchanged.
+    Byte counts are of the stored UTF-8.
+    """
+    from sqlalchemy import select, type_coerce, update
+    from .extensions import db
+    from .models import JournalEntry, Subpage
+
+    codec = resolve_codec(codec) if codec else _write_codec
+    totals = {"rows": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    for model in (JournalEntry, Subpage):
+        raw_content = type_coerce(model.content, Text)
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, raw_content.label("raw"))
+                .where(model.id > last_id, model.content.is_not(None))
+                .order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                packed = compress(decompress(row.raw), codec)
+                totals["rows"] += 1
+                totals["bytes_before"] += len(row.raw.encode("utf-8"))
+                totals["bytes_after"] += len(packed.encode("utf-8"))
+                if packed != row.raw:
+                    db.session.execute(
+                        update(model).where(model.id == row.id)
+                        .values(content=type_coerce(packed, Text), updated_at=model.updated_at)
+                    )
+                    totals["rewritten"] += 1
+            db.session.commit()
+            last_id = rows[-1].id
+    return totals
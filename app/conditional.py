@@ -0,0 +1,116 @@
+"""Conditional GET for per-user read-only views.
+
+``@conditional(Model, ...)`` computes a validator from a row count and the
+latest ``updated_at``/``created_at`` of the current user's rows in each
+model, in one statement, before the view runs. A matching If-None-Match is
+answered with 304 and the view is never called.
+
+The user's ``data_version`` (bumped on any write to the dashboard models,
+including edits that leave counts and timestamps alone) and the profile
+fields every page renders are part of the validator too, as is the user's
+local date for views that depend on it.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+from datetime import date
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import func, select
+
+from .extensions import db
+
+
+class ConditionalStats:
+    """Per-endpoint 304 hit counters, shown on /status/caches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def record(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {"hits": 0, "misses": 0, "bypassed": 0})
+            counts[outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {name: dict(counts) for name, counts in self._counts.items()}
+        for counts in result.values():
+            checked = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / checked, 4) if checked else 0.0
+        return result
+
+
+conditional_stats = ConditionalStats()
+_release = None
+
+
+def _release_token() -> str:
+    """Changes when templates or static files are redeployed; equal across workers."""
+    global _release
+    if _release is None:
+        newest = 0.0
+        for folder in ("templates", "static"):
+            for root, _, files in os.walk(os.path.join(current_app.root_path, folder)):
+                for name in files:
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+        _release = str(newest)
+    return _release
+
+
+def _validator(models) -> str:
+    columns = []
+    for model in models:
+        stamp = getattr(model, "updated_at", None) or model.created_at
+        scope = model.user_id == current_user.id
+        columns += [
+            select(func.count()).select_from(model).where(scope).scalar_subquery(),
+            select(func.max(stamp)).where(scope).scalar_subquery(),
+        ]
+    values = db.session.execute(select(*columns)).one()
+    # Pages embed a CSRF token, so they must not outlive it or its time limit.
+    # Creating it here keeps the first render of a session from changing the validator.
+    generate_csrf()
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600) or 0
+    parts = [
+        current_user.id, current_user.data_version, current_user.email, current_user.username,
+        current_user.avatar_url, current_user.timezone, current_user.local_today().isoformat(),
+        request.full_path, date.today().isoformat(), _release_token(),
+        session.get("csrf_token", ""), int(time.time() // (limit / 2)) if limit else 0, *values,
+    ]
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def conditional(*models):
+    """Serve 304 when nothing the view reads from ``models`` changed for the current user."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            endpoint = request.endpoint or view.__name__
+            # Pending flash messages are consumed by the render, so always render
+            if request.method != "GET" or not current_user.is_authenticated or session.get("_flashes"):
+                conditional_stats.record(endpoint, "bypassed")
+                return view(*args, **kwargs)
+            etag = _validator(models)
+            if request.if_none_match.contains(etag):
+                conditional_stats.record(endpoint, "hits")
+                response = current_app.response_class(status=304)
+            else:
+                conditional_stats.record(endpoint, "misses")
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapped
+
+    return decorator
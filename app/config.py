@@ -175,6 +175,19 @@ class Config:
 	TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 	TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
+	# Dashboard fragment cache ("memory" = per-process LRU, "null" = disabled)
+	FRAGMENT_CACHE_BACKEND = os.getenv("FRAGMENT_CACHE_BACKEND", "memory")
+	FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("FRAGMENT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+	# Bearer token for /status/caches (cache hit/miss counters); the endpoint 404s while unset
+	STATUS_TOKEN = os.getenv("STATUS_TOKEN", "")
+
+	# Codec for journal and subpage HTML at rest: "none", "zlib" or "zstd" (needs the zstandard package).
+	# Rows written under any setting stay readable; `flask compression recompress` converts old ones.
+	CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "none")
+
+	# Keep per-habit yearly completion bitmaps (habit_year_bits) alongside habit_logs
+	HABIT_BITSETS = os.getenv("HABIT_BITSETS", "false").lower() == "true"
+
 	# Scheduler
 	SCHEDULER_API_ENABLED = False
 	JOBS_TIMEZONE = os.getenv("JOBS_TIMEZONE", "UTC")
\ No newline at end of file
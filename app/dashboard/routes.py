@@ -2,45 +2,36 @@ from datetime import date
 from flask import render_template
 from flask_login import login_required, current_user
 
-from ..extensions import db
-from ..models import Habit, HabitLog, TodoItem, JournalEntry
+from ..api.routes import todo_cursor
+from ..cache import CSRF_SLOT, cached_fragments
+from .snapshot import load_dashboard
 from . import dashboard_bp
 
 
+PANELS = ("habits", "todos", "journal")
+
+
 @dashboard_bp.route("/")
 @login_required
 def index():
     today = date.today()
-    habits = Habit.query.filter_by(user_id=current_user.id).all()
-    today_logs = HabitLog.query.filter_by(user_id=current_user.id, log_date=today).all()
-    logs_map = {log.habit_id: log for log in today_logs}
-
-    # Get all todos for expand/collapse functionality
-    all_todos = (
-        TodoItem.query.filter_by(user_id=current_user.id, kind="todo")
-        .order_by(TodoItem.is_done.asc(), TodoItem.position.asc(), TodoItem.created_at.asc())
-        .all()
-    )
-    all_not_todos = (
-        TodoItem.query.filter_by(user_id=current_user.id, kind="not_todo")
-        .order_by(TodoItem.is_done.asc(), TodoItem.position.asc(), TodoItem.created_at.asc())
-        .all()
-    )
-    
-    # Show first 4 by default
-    todos = all_todos[:4]
-    not_todos = all_not_todos[:4]
 
-    today_entry = JournalEntry.query.filter_by(user_id=current_user.id, entry_date=today).first()
+    def render(missing):
+        snap = load_dashboard(current_user.id, today)
+        context = dict(
+            habits=snap.habits,
+            # First page only; "Show All" pages through /api/todos from the cursors
+            todos=snap.todos,
+            not_todos=snap.not_todos,
+            todo_total=snap.todo_total,
+            not_todo_total=snap.not_todo_total,
+            todo_cursor=todo_cursor(snap.todos[-1]) if snap.todos else "",
+            not_todo_cursor=todo_cursor(snap.not_todos[-1]) if snap.not_todos else "",
+            today_entry=snap.today_entry,
+            today=today,
+            csrf_slot=CSRF_SLOT,
+        )
+        return {name: render_template(f"dashboard/_{name}.html", **context) for name in missing}
 
-    return render_template(
-        "dashboard/index.html",
-        habits=habits,
-        logs_map=logs_map,
-        todos=todos,
-        not_todos=not_todos,
-        all_todos=all_todos,
-        all_not_todos=all_not_todos,
-        today_entry=today_entry,
-        today=today,
-    )
\ No newline at end of file
+    panels = cached_fragments(current_user, today, PANELS, render)
+    return render_template("dashboard/index.html", panels=panels, today=today)
@@ -0,0 +1,158 @@
+"""Dashboard read model: everything the dashboard shows, fetched in one statement."""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import select, union_all, literal, null, cast, case, and_, func, Integer, String, Date, DateTime
+
+from ..extensions import db
+from ..models import Habit, HabitLog, HabitStats, TodoItem, JournalEntry
+from ..scheduling import due_on
+
+
+# Todos shown per list before "Show All"; the rest come from /api/todos.
+TODO_PAGE_SIZE = 4
+
+
+@dataclass(frozen=True)
+class HabitItem:
+    id: int
+    name: str
+    color: Optional[str]
+    icon: Optional[str]
+    done: bool
+    current_streak: int
+    longest_streak: int
+
+
+@dataclass(frozen=True)
+class TodoRow:
+    id: int
+    label: str
+    is_done: bool
+    position: str
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class JournalItem:
+    id: int
+    title: Optional[str]
+    content: Optional[str]
+
+
+@dataclass
+class DashboardSnapshot:
+    today: date
+    habits: list[HabitItem] = field(default_factory=list)
+    todos: list[TodoRow] = field(default_factory=list)
+    not_todos: list[TodoRow] = field(default_factory=list)
+    todo_total: int = 0
+    not_todo_total: int = 0
+    today_entry: Optional[JournalItem] = None
+
+
+def _snapshot_query(user_id: int, today: date):
+    """UNION ALL of habits due today (+ today's log and stats), todos and today's journal entry.
+
+    Every branch produces the same generic columns; ``kind`` says how to read
+    a row and ``rank`` preserves each section's own ordering. Only the first
+    page of each todo list is returned, with the list size in ``n2`` and the
+    rank key in ``sort_key``.
+    """
+    null_int = cast(null(), Integer)
+    null_str = cast(null(), String)
+
+    habits = (
+        select(
+            literal("habit", String).label("kind"),
+            Habit.id.label("id"),
+            Habit.name.label("label"),
+            Habit.color.label("color"),
+            Habit.icon.label("icon"),
+            case((HabitLog.id.isnot(None), 1), else_=0).label("flag"),
+            HabitStats.current_streak.label("n1"),
+            HabitStats.longest_streak.label("n2"),
+            HabitStats.last_completed_date.label("day"),
+            Habit.created_at.label("created_at"),
+            cast(null(), JournalEntry.content.type).label("content"),
+            null_str.label("sort_key"),
+            func.row_number().over(order_by=Habit.id).label("rank"),
+        )
+        .select_from(Habit)
+        .outerjoin(HabitLog, and_(HabitLog.habit_id == Habit.id, HabitLog.user_id == user_id, HabitLog.log_date == today))
+        .outerjoin(HabitStats, HabitStats.habit_id == Habit.id)
+        .where(Habit.user_id == user_id, due_on(today))
+    )
+    ranked_todos = (
+        select(
+            TodoItem.kind,
+            TodoItem.id,
+            TodoItem.label,
+            TodoItem.is_done,
+            TodoItem.position,
+            TodoItem.created_at,
+            func.row_number().over(
+                partition_by=TodoItem.kind,
+                order_by=(TodoItem.is_done.asc(), TodoItem.position.asc(), TodoItem.created_at.asc(), TodoItem.id.asc()),
+            ).label("rank"),
+            func.count().over(partition_by=TodoItem.kind).label("total"),
+        )
+        .where(TodoItem.user_id == user_id)
+        .subquery("ranked_todos")
+    )
+    todos = select(
+        ranked_todos.c.kind,
+        ranked_todos.c.id,
+        ranked_todos.c.label,
+        null_str,
+        null_str,
+        case((ranked_todos.c.is_done.is_(True), 1), else_=0),
+        null_int,
+        ranked_todos.c.total,
+        cast(null(), Date),
+        ranked_todos.c.created_at,
+        cast(null(), JournalEntry.content.type),
+        ranked_todos.c.position,
+        ranked_todos.c.rank,
+    ).where(ranked_todos.c.rank <= TODO_PAGE_SIZE)
+    journal = select(
+        literal("journal", String),
+        JournalEntry.id,
+        JournalEntry.title,
+        null_str,
+        null_str,
+        literal(0, Integer),
+        null_int,
+        null_int,
+        cast(null(), Date),
+        cast(null(), DateTime),
+        JournalEntry.content,
+        null_str,
+        func.row_number().over(order_by=JournalEntry.id),
+    ).where(JournalEntry.user_id == user_id, JournalEntry.entry_date == today)
+
+    rows = union_all(habits, todos, journal).subquery("snapshot")
+    return select(rows).order_by(rows.c.kind, rows.c.rank)
+
+
+def load_dashboard(user_id: int, today: Optional[date] = None) -> DashboardSnapshot:
+    today = today or date.today()
+    snap = DashboardSnapshot(today=today)
+    for row in db.session.execute(_snapshot_query(user_id, today)):
+        if row.kind == "habit":
+            current = (row.n1 or 0) if row.day == today else 0
+            snap.habits.append(HabitItem(row.id, row.label, row.color, row.icon, bool(row.flag), current, row.n2 or 0))
+        elif row.kind == "journal":
+            if snap.today_entry is None:
+                snap.today_entry = JournalItem(row.id, row.label, row.content)
+        else:
+            item = TodoRow(row.id, row.label, bool(row.flag), row.sort_key, row.created_at)
+            if row.kind == "not_todo":
+                snap.not_todos.append(item)
+                snap.not_todo_total = row.n2
+            else:
+                snap.todos.append(item)
+                snap.todo_total = row.n2
+    return snap
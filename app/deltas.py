@@ -0,0 +1,67 @@
+"""Quill-style text deltas applied to stored strings.
+
+A delta is a list of ops, each ``{"retain": n}``, ``{"delete": n}`` or
+``{"insert": "text"}``, walked from the start of the document; whatever
+follows the last op is kept. Counts are UTF-16 code units, which is what
+JavaScript string lengths measure, so a browser can diff two strings and
+send the result without caring about characters outside the BMP.
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+
+
+MAX_OPS = 1000
+
+
+def _count(value) -> int:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError("retain and delete take a non-negative integer")
+    return value
+
+
+def apply_delta(text: str, ops: list) -> str:
+    """``text`` with ``ops`` applied; raises ValueError on a malformed delta or one that overruns it."""
+    if not isinstance(ops, list) or len(ops) > MAX_OPS:
+        raise ValueError(f"ops must be a list of at most {MAX_OPS} operations")
+    units = text.encode("utf-16-le", "surrogatepass")
+    length = len(units) // 2
+    parts, pos = [], 0
+    for op in ops:
+        if not isinstance(op, dict) or len(op) != 1:
+            raise ValueError("each op must have exactly one of retain, delete or insert")
+        (kind, value), = op.items()
+        if kind == "insert":
+            if not isinstance(value, str):
+                raise ValueError("insert takes a string")
+            parts.append(value.encode("utf-16-le", "surrogatepass"))
+            continue
+        if kind not in ("retain", "delete"):
+            raise ValueError(f"unknown op {kind!r}")
+        end = pos + _count(value)
+        if end > length:
+            raise ValueError(f"{kind} runs past the end of the document")
+        if kind == "retain":
+            parts.append(units[2 * pos:2 * end])
+        pos = end
+    parts.append(units[2 * pos:])
+    try:
+        return b"".join(parts).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise ValueError("delta splits a surrogate pair") from None
+
+
+def text_hash(text: str) -> str:
+    """32-bit FNV-1a over the UTF-16 code units of ``text``, as 8 hex digits.
+
+    The browser computes the same over the copy it diffed against, so a delta
+    made against different text than what is stored can be refused.
+    """
+    units = array("H", text.encode("utf-16-le", "surrogatepass"))
+    if sys.byteorder == "big":
+        units.byteswap()
+    h = 0x811C9DC5
+    for unit in units:
+        h = ((h ^ unit) * 0x01000193) & 0xFFFFFFFF
+    return f"{h:08x}"
@@ -1,5 +1,6 @@
 import io
 import json
+import textwrap
 from datetime import date
 from flask import jsonify, request, send_file, flash, redirect, url_for
 from flask_login import login_required, current_user
@@ -8,9 +9,13 @@ from reportlab.pdfgen import canvas
 
 from ..extensions import db
 from ..models import User, Habit, HabitLog, JournalEntry, Category, Subpage, FileAsset, TodoItem, Reminder
+from ..text import html_to_text
 from . import exports_bp
 
 
+PDF_LINE_CHARS = 80  # Times-Roman 14pt across a letter page with 40pt margins
+
+
 @exports_bp.route("/export.json")
 @login_required
 def export_json():
@@ -81,9 +86,15 @@ def export_journal_day_pdf(entry_date: str):
     textobject.textLine(f"Journal for {entry_date}")
 
     entry = JournalEntry.query.filter_by(user_id=current_user.id, entry_date=date.fromisoformat(entry_date)).first()
-    content = (entry.title or "") + "\n\n" + (entry.content or "") if entry else "No entry."
+    content = (entry.title or "") + "\n\n" + html_to_text(entry.content) if entry else "No entry."
     for line in content.splitlines():
-        textobject.textLine(line)
+        for wrapped in textwrap.wrap(line, PDF_LINE_CHARS) or [""]:
+            if textobject.getY() < 40:
+                p.drawText(textobject)
+                p.showPage()
+                textobject = p.beginText(40, 750)
+                textobject.setFont("Times-Roman", 14)
+            textobject.textLine(wrapped)
     p.drawText(textobject)
     p.showPage()
     p.save()
@@ -2,12 +2,14 @@ import os
 from flask import render_template, send_file, abort, redirect, flash
 from flask_login import login_required, current_user
 
+from ..conditional import conditional
 from ..models import FileAsset
 from . import files_bp
 
 
 @files_bp.route("/")
 @login_required
+@conditional(FileAsset)
 def list_files():
     files = FileAsset.query.filter_by(user_id=current_user.id).order_by(FileAsset.created_at.desc()).all()
     return render_template("files/list.html", files=files)
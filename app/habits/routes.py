@@ -2,16 +2,20 @@ from datetime import date, datetime
 from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 
+from ..conditional import conditional
 from ..extensions import db
-from ..models import Habit, HabitLog, Reminder
+from ..models import Habit, HabitLog, HabitStats, Reminder
+from ..streaks import stats_for_user, record_habit_log
 from . import habits_bp
 
 
 @habits_bp.route("/")
 @login_required
+@conditional(Habit, HabitLog, HabitStats)
 def list_habits():
     habits = Habit.query.filter_by(user_id=current_user.id).all()
-    return render_template("habits/list.html", habits=habits)
+    streaks = stats_for_user(current_user.id)
+    return render_template("habits/list.html", habits=habits, streaks=streaks)
 
 
 @habits_bp.route("/create", methods=["GET", "POST"])
@@ -107,11 +111,13 @@ def toggle_today(habit_id: int):
     log = HabitLog.query.filter_by(user_id=current_user.id, habit_id=habit.id, log_date=today).first()
     if log:
         db.session.delete(log)
+        record_habit_log(current_user.id, habit.id, today, completed=False)
         db.session.commit()
         flash("Unchecked today's habit.", "info")
     else:
         log = HabitLog(user_id=current_user.id, habit_id=habit.id, log_date=today, completed=True)
         db.session.add(log)
+        record_habit_log(current_user.id, habit.id, today, completed=True)
         db.session.commit()
         flash("Checked today's habit.", "success")
     return redirect(request.referrer or url_for("dashboard.index"))
\ No newline at end of file
@@ -1,11 +1,15 @@
 from datetime import datetime, date
+from functools import partial
 import smtplib
 from email.message import EmailMessage
 import requests
 
-from flask import current_app
+from flask import Flask, current_app
+from sqlalchemy import select, func, or_
 from .extensions import db, scheduler
 from .models import Reminder, Habit, HabitLog, User
+from .ranking import rebalance_long_ranks
+from .scheduling import due_on, sunday_weekday
 
 
 def send_email(to_address: str, subject: str, body: str) -> None:
@@ -41,22 +45,43 @@ def send_telegram(chat_id: str, text: str) -> None:
         pass
 
 
-def schedule_jobs() -> None:
+def run_in_app_context(app: Flask, job, *args, **kwargs):
+    """Scheduler threads have no Flask context; jobs need one for db.session and current_app."""
+    with app.app_context():
+        try:
+            return job(*args, **kwargs)
+        finally:
+            db.session.remove()
+
+
+def schedule_jobs(app: Flask) -> None:
+    def in_app(job):
+        return partial(run_in_app_context, app, job)
+
     # Frequent job checks reminders
     if not scheduler.get_job("reminder_tick"):
-        scheduler.add_job(check_and_send_reminders, "interval", minutes=1, id="reminder_tick", max_instances=1, replace_existing=True)
+        scheduler.add_job(in_app(check_and_send_reminders), "interval", minutes=1, id="reminder_tick", max_instances=1, replace_existing=True)
 
     # Daily summary at 21:00 local server time
     if not scheduler.get_job("daily_summary"):
-        scheduler.add_job(send_daily_summary, "cron", hour=21, id="daily_summary", replace_existing=True)
+        scheduler.add_job(in_app(send_daily_summary), "cron", hour=21, id="daily_summary", replace_existing=True)
+
+    # Respace task/todo rank keys that have grown long from repeated moves
+    if not scheduler.get_job("rank_rebalance"):
+        scheduler.add_job(in_app(rebalance_long_ranks), "cron", hour=3, minute=30, id="rank_rebalance", replace_existing=True)
 
 
 def check_and_send_reminders():
     now = datetime.now()
     today = date.today()
-    weekday = today.weekday()  # 0=Mon
-    reminders = Reminder.query.filter_by(enabled=True).all()
-    for r in reminders:
+    weekday = sunday_weekday(today)  # reminder weekdays use 0=Sun like the forms
+    # Habit reminders only fire on days the habit is due
+    rows = db.session.execute(
+        select(Reminder, Habit)
+        .outerjoin(Habit, Reminder.habit_id == Habit.id)
+        .where(Reminder.enabled.is_(True), or_(Reminder.habit_id.is_(None), due_on(today)))
+    ).all()
+    for r, habit in rows:
         # Only handle simple daily time + weekdays here
         if r.when_time:
             if r.weekdays:
@@ -65,8 +90,7 @@ def check_and_send_reminders():
                     continue
             if now.hour == r.when_time.hour and now.minute == r.when_time.minute:
                 message = "Habit reminder"
-                if r.habit_id:
-                    habit = Habit.query.get(r.habit_id)
+                if habit:
                     message = f"Reminder: {habit.name}"
                 user = User.query.get(r.user_id)
                 if r.channel == "email":
@@ -77,8 +101,20 @@ def check_and_send_reminders():
 
 def send_daily_summary():
     today = date.today()
+    due = dict(
+        db.session.execute(
+            select(Habit.user_id, func.count()).where(due_on(today)).group_by(Habit.user_id)
+        ).all()
+    )
+    done = dict(
+        db.session.execute(
+            select(HabitLog.user_id, func.count())
+            .join(Habit, HabitLog.habit_id == Habit.id)
+            .where(HabitLog.log_date == today, HabitLog.completed.is_(True), due_on(today))
+            .group_by(HabitLog.user_id)
+        ).all()
+    )
     for user in User.query.all():
-        logs = HabitLog.query.filter_by(user_id=user.id, log_date=today, completed=True).count()
         subject = "Your daily summary"
-        body = f"You completed {logs} habits today. Keep it up!"
-        send_email(user.email, subject, body)
\ No newline at end of file
+        body = f"You completed {done.get(user.id, 0)} of {due.get(user.id, 0)} habits due today. Keep it up!"
+        send_email(user.email, subject, body)
@@ -1,23 +1,54 @@
 from datetime import date, datetime
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, abort, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
 
+from .. import journal_fields  # noqa: F401  keeps JournalEntry.excerpt in sync
+from ..conditional import conditional
+from ..deltas import apply_delta, text_hash
 from ..extensions import db
 from ..models import JournalEntry
+from ..pagination import encode_cursor, decode_cursor
 from . import journal_bp
 
 
+PER_PAGE = 100
+
+
+def listing_query(user_id: int, after=None, limit: int = PER_PAGE):
+	"""One page of the journal list, newest first, after the (entry_date, id) key ``after``.
+
+	Only the listing columns are loaded; ``content`` stays deferred.
+	"""
+	q = (select(JournalEntry)
+		.options(load_only(JournalEntry.id, JournalEntry.entry_date, JournalEntry.title, JournalEntry.excerpt,
+			JournalEntry.word_count))
+		.where(JournalEntry.user_id == user_id))
+	if after is not None:
+		q = q.where(tuple_(JournalEntry.entry_date, JournalEntry.id) < tuple_(*after))
+	return q.order_by(JournalEntry.entry_date.desc(), JournalEntry.id.desc()).limit(limit)
+
+
 @journal_bp.route("/")
 @login_required
+@conditional(JournalEntry)
 def journal_index():
-	page = max(int(request.args.get("page", 1)), 1)
-	per_page = 100
-	q = (JournalEntry.query
-		.filter_by(user_id=current_user.id)
-		.order_by(JournalEntry.entry_date.desc()))
-	entries = q.offset((page-1)*per_page).limit(per_page).all()
+	after = None
+	cursor = request.args.get("cursor")
+	if cursor:
+		entry_date, entry_id = decode_cursor(cursor, 2)
+		try:
+			after = (date.fromisoformat(entry_date), int(entry_id))
+		except (TypeError, ValueError):
+			abort(400, "Invalid cursor")
+	entries = db.session.execute(listing_query(current_user.id, after, PER_PAGE + 1)).scalars().all()
+	next_cursor = encode_cursor(entries[PER_PAGE - 1].entry_date, entries[PER_PAGE - 1].id) if len(entries) > PER_PAGE else None
 	today = date.today()
-	return render_template("journal/index.html", entries=entries, today=today, page=page)
+	return render_template("journal/index.html", entries=entries[:PER_PAGE], today=today,
+		next_cursor=next_cursor, is_first_page=after is None)
 
 
 @journal_bp.route("/day/<string:entry_date>", methods=["GET", "POST"])
@@ -38,9 +69,71 @@ def journal_day(entry_date: str):
 		else:
 			entry = JournalEntry(user_id=current_user.id, entry_date=d, title=title, content=content)
 			db.session.add(entry)
-		db.session.commit()
+		try:
+			db.session.commit()
+		except (StaleDataError, IntegrityError):
+			# Saved from elsewhere between the read above and this write
+			db.session.rollback()
+			flash("This entry was changed elsewhere, so your edit was not saved. Here is the latest copy.", "warning")
+			return redirect(url_for("journal.journal_day", entry_date=d.isoformat()))
 		flash("Entry saved.", "success")
 		return redirect(url_for("journal.journal_day", entry_date=d.isoformat()))
 	if not entry:
 		entry = JournalEntry(user_id=current_user.id, entry_date=d, title="", content="")
-	return render_template("journal/day.html", entry=entry)
\ No newline at end of file
+	return render_template("journal/day.html", entry=entry)
+
+
+def _autosave_conflict(entry):
+	# The client rebases its unsaved edits onto this and retries
+	return jsonify({
+		"error": "Entry was changed elsewhere",
+		"version": entry.version if entry else 0,
+		"title": entry.title if entry else "",
+		"content": entry.content if entry else "",
+	}), 409
+
+
+@journal_bp.post("/day/<string:entry_date>/autosave")
+@login_required
+def journal_autosave(entry_date: str):
+	"""Apply ``{"version", "base_hash", "ops", "title"?}`` to the entry.
+
+	``version`` is the one the ops were made against (0 = new) and ``base_hash``
+	the :func:`~app.deltas.text_hash` of the text they were diffed from; if that
+	is not the stored content, the ops would land at the wrong offsets, so the
+	client gets a 409 and rebases.
+	"""
+	try:
+		d = date.fromisoformat(entry_date)
+	except ValueError:
+		return jsonify({"error": "Invalid date"}), 400
+	payload = request.get_json(silent=True) or {}
+	base = payload.get("version")
+	base_hash = payload.get("base_hash")
+	title = payload.get("title")
+	if (not isinstance(base, int) or not isinstance(base_hash, str)
+			or (title is not None and not isinstance(title, str))):
+		return jsonify({"error": "version must be an integer, base_hash and title strings"}), 400
+	entry = JournalEntry.query.filter_by(user_id=current_user.id, entry_date=d).first()
+	stored = (entry.content or "") if entry else ""
+	if base != (entry.version if entry else 0) or base_hash != text_hash(stored):
+		return _autosave_conflict(entry)
+	try:
+		content = apply_delta(stored, payload.get("ops", []))
+	except ValueError as exc:
+		return jsonify({"error": str(exc)}), 400
+	if entry is None:
+		entry = JournalEntry(user_id=current_user.id, entry_date=d, title=title or "", content=content)
+		db.session.add(entry)
+	else:
+		entry.content = content
+		if title is not None:
+			entry.title = title
+	try:
+		db.session.commit()
+	except (StaleDataError, IntegrityError):
+		# Another save landed between the read above and this write: an UPDATE
+		# of a newer version, or an INSERT of the day's first entry
+		db.session.rollback()
+		return _autosave_conflict(JournalEntry.query.filter_by(user_id=current_user.id, entry_date=d).first())
+	return jsonify({"version": entry.version})
@@ -0,0 +1,94 @@
+"""Columns derived from JournalEntry.content, refreshed before every write.
+
+Listings and stats read these instead of the rich HTML, so ``content`` can
+stay deferred outside the editor; the month/day copies of ``entry_date``
+serve the indexed "on this day" lookup. ``flask journal-fields backfill`` fills
+them for rows written before a column existed.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import load_only
+
+from .cache import bump_user_version
+from .extensions import db
+from .models import JournalEntry
+from .text import html_to_text
+
+
+EXCERPT_LENGTH = 200
+_WORD = re.compile(r"\w+(?:['’-]\w+)*", re.UNICODE)
+
+
+def excerpt(text: str) -> str:
+    """Whitespace-collapsed start of ``text``, cut at a word boundary."""
+    flat = " ".join(text.split())
+    if len(flat) <= EXCERPT_LENGTH:
+        return flat
+    cut = flat[:EXCERPT_LENGTH].rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+def derived_fields(html) -> dict:
+    text = html_to_text(html)
+    return {"excerpt": excerpt(text), "plaintext_len": len(text), "word_count": len(_WORD.findall(text))}
+
+
+def refresh_derived_fields(entry: JournalEntry) -> None:
+    for name, value in derived_fields(entry.content).items():
+        setattr(entry, name, value)
+
+
+def refresh_date_fields(entry: JournalEntry) -> None:
+    entry.entry_month = entry.entry_date.month
+    entry.entry_day = entry.entry_date.day
+
+
+@event.listens_for(JournalEntry, "before_insert")
+def _before_insert(mapper, connection, target):
+    if target.entry_date is None:
+        target.entry_date = date.today()  # the column default, needed before it would apply
+    refresh_derived_fields(target)
+    refresh_date_fields(target)
+
+
+@event.listens_for(JournalEntry, "before_update")
+def _before_update(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.content.history.has_changes():
+        refresh_derived_fields(target)
+    if state.attrs.entry_date.history.has_changes():
+        refresh_date_fields(target)
+
+
+def backfill_derived_fields(batch_size: int = 500, only_missing: bool = True) -> int:
+    """Recompute the derived columns in id-ordered batches; returns rows written.
+
+    Uses Core UPDATEs so the entries' ``updated_at`` and ``version`` stay as
+    they are: the text itself did not change.
+    """
+    written = 0
+    last_id = 0
+    while True:
+        q = (select(JournalEntry).options(load_only(JournalEntry.id, JournalEntry.user_id, JournalEntry.content))
+             .where(JournalEntry.id > last_id).order_by(JournalEntry.id).limit(batch_size))
+        if only_missing:
+            q = q.where((JournalEntry.word_count.is_(None)) | (JournalEntry.plaintext_len.is_(None))
+                        | (JournalEntry.excerpt.is_(None)))
+        batch = db.session.execute(q).scalars().all()
+        if not batch:
+            break
+        for entry in batch:
+            db.session.execute(
+                update(JournalEntry).where(JournalEntry.id == entry.id)
+                .values(updated_at=JournalEntry.updated_at, **derived_fields(entry.content))
+                .execution_options(synchronize_session=False)
+            )
+        # Core UPDATEs skip the flush hook that invalidates cached journal stats
+        bump_user_version(*(entry.user_id for entry in batch))
+        written += len(batch)
+        last_id = batch[-1].id
+        db.session.commit()
+        db.session.expunge_all()
+    return written
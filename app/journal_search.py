@@ -0,0 +1,188 @@
+"""Full-text search over journal entries.
+
+SQLite keeps an FTS5 table ``journal_fts`` (rowid = entry id); PostgreSQL
+keeps ``journal_search_docs`` with a weighted ``tsvector`` under a GIN
+index. Neither is part of the ORM metadata: the migration creates the one
+for the running dialect and ``flask journal-search rebuild`` refills it.
+Both store the entry's text with the HTML stripped, and are kept in sync by
+mapper events on JournalEntry in the same transaction as the write.
+"""
+from __future__ import annotations
+import re
+from datetime import date
+from typing import Optional
+
+from markupsafe import escape
+from sqlalchemy import event, inspect, text
+
+from .extensions import db
+from .models import JournalEntry
+from .text import html_to_text
+
+
+SNIPPET_TOKENS = 16
+_MARK_START, _MARK_END = "\x02", "\x03"  # swapped for <mark> after escaping
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Engines known to have the search table; a missing table is checked again
+# on every use so that a later ``journal-search rebuild`` is picked up
+_index_present: set[int] = set()
+
+
+def has_index(connection) -> bool:
+    key = id(connection.engine)
+    if key not in _index_present:
+        table = "journal_fts" if connection.dialect.name == "sqlite" else "journal_search_docs"
+        if connection.dialect.name in ("sqlite", "postgresql") and inspect(connection).has_table(table):
+            _index_present.add(key)
+    return key in _index_present
+
+
+def create_index(connection) -> None:
+    """DDL for the dialect's search table (shared with the migration)."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts "
+            "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS journal_search_docs ("
+            " entry_id INTEGER PRIMARY KEY REFERENCES journal_entries (id) ON DELETE CASCADE,"
+            " user_id INTEGER NOT NULL,"
+            " entry_date DATE NOT NULL,"
+            " body TEXT NOT NULL,"
+            " document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_journal_search_docs_document ON journal_search_docs USING GIN (document)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_journal_search_docs_user_date ON journal_search_docs (user_id, entry_date)"
+        ))
+    _index_present.discard(id(connection.engine))
+
+
+def _index_entry(connection, entry_id: int, user_id: int, entry_date: date, title: Optional[str], html: Optional[str]):
+    params = {"id": entry_id, "user_id": user_id, "entry_date": entry_date,
+              "title": title or "", "body": html_to_text(html)}
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM journal_fts WHERE rowid = :id"), params)
+        connection.execute(text("INSERT INTO journal_fts (rowid, title, body) VALUES (:id, :title, :body)"), params)
+    else:
+        connection.execute(text(
+            "INSERT INTO journal_search_docs (entry_id, user_id, entry_date, body, document) "
+            "VALUES (:id, :user_id, :entry_date, :body, "
+            " setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B')) "
+            "ON CONFLICT (entry_id) DO UPDATE SET user_id = excluded.user_id, entry_date = excluded.entry_date, "
+            " body = excluded.body, document = excluded.document"
+        ), params)
+
+
+def _unindex_entry(connection, entry_id: int) -> None:
+    table, key = ("journal_fts", "rowid") if connection.dialect.name == "sqlite" else ("journal_search_docs", "entry_id")
+    connection.execute(text(f"DELETE FROM {table} WHERE {key} = :id"), {"id": entry_id})
+
+
+@event.listens_for(JournalEntry, "after_insert")
+def _entry_inserted(mapper, connection, target):
+    if has_index(connection):
+        _index_entry(connection, target.id, target.user_id, target.entry_date, target.title, target.content)
+
+
+@event.listens_for(JournalEntry, "after_update")
+def _entry_updated(mapper, connection, target):
+    state = inspect(target)
+    changed = any(state.attrs[name].history.has_changes() for name in ("title", "content", "entry_date", "user_id"))
+    if changed and has_index(connection):
+        _index_entry(connection, target.id, target.user_id, target.entry_date, target.title, target.content)
+
+
+@event.listens_for(JournalEntry, "after_delete")
+def _entry_deleted(mapper, connection, target):
+    if has_index(connection):
+        _unindex_entry(connection, target.id)
+
+
+def rebuild_search_index(batch_size: int = 500) -> int:
+    """Create the search table if needed and reindex every entry; returns entries indexed."""
+    connection = db.session.connection()
+    create_index(connection)
+    connection.execute(text("DELETE FROM journal_fts" if connection.dialect.name == "sqlite" else "DELETE FROM journal_search_docs"))
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = (JournalEntry.query.filter(JournalEntry.id > last_id)
+                 .order_by(JournalEntry.id).limit(batch_size).all())
+        if not batch:
+            break
+        for e in batch:
+            _index_entry(connection, e.id, e.user_id, e.entry_date, e.title, e.content)
+        indexed += len(batch)
+        last_id = batch[-1].id
+        db.session.expunge_all()
+    db.session.commit()
+    return indexed
+
+
+def _fts5_query(q: str) -> str:
+    """User input as an FTS5 query: every word must match, the last one as a prefix."""
+    words = _WORD.findall(q)
+    if not words:
+        return ""
+    quoted = ['"%s"' % w for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet: str) -> str:
+    return str(escape(snippet)).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search(user_id: int, q: str, start: Optional[date] = None, end: Optional[date] = None,
+           limit: int = 20) -> list[dict]:
+    """Best-ranked entries of ``user_id`` matching ``q``, with highlighted snippets (HTML)."""
+    connection = db.session.connection()
+    if not q.strip():
+        return []
+    params = {"user_id": user_id, "start": start, "end": end, "limit": limit,
+              "mark_start": _MARK_START, "mark_end": _MARK_END}
+    dates = ""
+    if start:
+        dates += " AND e.entry_date >= :start"
+    if end:
+        dates += " AND e.entry_date <= :end"
+    if connection.dialect.name == "sqlite":
+        params["q"] = _fts5_query(q)
+        if not params["q"]:
+            return []
+        # Raw SQL on SQLite compares dates as ISO strings
+        params.update(start=start and start.isoformat(), end=end and end.isoformat())
+        rows = connection.execute(text(
+            "SELECT e.id, e.entry_date, e.title, "
+            f" snippet(journal_fts, 1, :mark_start, :mark_end, '…', {SNIPPET_TOKENS}) AS snippet, "
+            " bm25(journal_fts, 4.0, 1.0) AS score "
+            "FROM journal_fts JOIN journal_entries e ON e.id = journal_fts.rowid "
+            f"WHERE journal_fts MATCH :q AND e.user_id = :user_id{dates} "
+            "ORDER BY score LIMIT :limit"
+        ), params).all()
+        scores = [-r.score for r in rows]  # bm25: lower is better
+    else:
+        params["q"] = q
+        params["options"] = (f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_TOKENS * 2}, "
+                             "MinWords=5, MaxFragments=2, FragmentDelimiter=\" … \"")
+        rows = connection.execute(text(
+            "SELECT e.id, e.entry_date, e.title, "
+            " ts_headline('simple', d.body, query, :options) AS snippet, "
+            " ts_rank_cd(d.document, query) AS score "
+            "FROM journal_search_docs d JOIN journal_entries e ON e.id = d.entry_id, "
+            " websearch_to_tsquery('simple', :q) AS query "
+            f"WHERE d.user_id = :user_id AND d.document @@ query{dates.replace('e.entry_date', 'd.entry_date')} "
+            "ORDER BY score DESC, e.entry_date DESC LIMIT :limit"
+        ), params).all()
+        scores = [r.score for r in rows]
+    return [
+        {"id": r.id, "date": (r.entry_date if isinstance(r.entry_date, date) else date.fromisoformat(r.entry_date)).isoformat(),
+         "title": r.title or "", "snippet": _highlight(r.snippet or ""), "rank": round(float(score), 6)}
+        for r, score in zip(rows, scores)
+    ]
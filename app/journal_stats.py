@@ -0,0 +1,124 @@
+"""Aggregates over a user's journal that never read entry content.
+
+The heatmap counts entries per day; writing stats sum the derived
+``word_count``/``plaintext_len`` columns (app/journal_fields.py) per month;
+"on this day" finds earlier years' entries through the stored month/day pair.
+
+Each result is cached per user under the user's ``data_version`` (see
+app/cache.py), which every journal write bumps; the heatmap also per day. Values
+are stored as the serialized JSON bytes the endpoint returns, so a hit
+allocates nothing proportional to the journal.
+"""
+from __future__ import annotations
+import calendar
+import json
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import case, extract, func, select
+
+from .cache import LRUCache
+from .extensions import db
+from .models import JournalEntry, User
+
+
+HEATMAP_DAYS = 365
+
+journal_cache = LRUCache(2 * 1024 * 1024)
+
+
+def heatmap_query(user_id: int, today: date):
+    """Entries per day since ``today - HEATMAP_DAYS``; covered by ix_journal_entries_user_date."""
+    return (
+        select(JournalEntry.entry_date, func.count().label("count"))
+        .where(JournalEntry.user_id == user_id, JournalEntry.entry_date >= today - timedelta(days=HEATMAP_DAYS))
+        .group_by(JournalEntry.entry_date)
+        .order_by(JournalEntry.entry_date)
+    )
+
+
+def heatmap_json(user: User, today: Optional[date] = None) -> bytes:
+    today = today or date.today()
+    key = ("heatmap", user.id, user.data_version, today)
+    data = journal_cache.get(key)
+    if data is None:
+        rows = db.session.execute(heatmap_query(user.id, today))
+        data = json.dumps([{"date": d.isoformat(), "count": n} for d, n in rows], separators=(",", ":")).encode()
+        journal_cache.set(key, data)
+    return data
+
+
+def writing_stats_query(user_id: int, year: int):
+    """Entries, words and characters per month of ``year``, summed from the derived columns."""
+    month = extract("month", JournalEntry.entry_date)
+    return (
+        select(
+            month.label("month"),
+            func.count().label("entries"),
+            func.coalesce(func.sum(JournalEntry.word_count), 0).label("words"),
+            func.coalesce(func.sum(JournalEntry.plaintext_len), 0).label("chars"),
+            func.count(case((JournalEntry.word_count.is_(None), 1))).label("uncounted"),
+        )
+        .where(JournalEntry.user_id == user_id,
+               JournalEntry.entry_date >= date(year, 1, 1), JournalEntry.entry_date <= date(year, 12, 31))
+        .group_by(month)
+    )
+
+
+def writing_stats_json(user: User, year: int) -> bytes:
+    key = ("writing", user.id, user.data_version, year)
+    data = journal_cache.get(key)
+    if data is None:
+        by_month = {int(r.month): r for r in db.session.execute(writing_stats_query(user.id, year))}
+        months = [
+            {"month": m, "entries": r.entries, "words": int(r.words), "chars": int(r.chars)} if (r := by_month.get(m))
+            else {"month": m, "entries": 0, "words": 0, "chars": 0}
+            for m in range(1, 13)
+        ]
+        data = json.dumps({
+            "year": year,
+            "entries": sum(m["entries"] for m in months),
+            "words": sum(m["words"] for m in months),
+            "chars": sum(m["chars"] for m in months),
+            # Entries written before the columns existed; run flask journal-fields backfill
+            "uncounted": sum(r.uncounted for r in by_month.values()),
+            "months": months,
+        }, separators=(",", ":")).encode()
+        journal_cache.set(key, data)
+    return data
+
+
+def on_this_day_query(user_id: int, today: date):
+    """Entries from ``today``'s month and day in any year, newest first.
+
+    On 28 February of a common year, 29 February entries are included too.
+    The caller drops this year's (and any later) rows: a date bound here
+    would tempt the planner onto ix_journal_entries_user_date instead.
+    """
+    last_day = today.day
+    if (today.month, today.day) == (2, 28) and not calendar.isleap(today.year):
+        last_day = 29
+    return (
+        select(JournalEntry.id, JournalEntry.entry_date, JournalEntry.title, JournalEntry.excerpt,
+               JournalEntry.word_count)
+        .where(JournalEntry.user_id == user_id, JournalEntry.entry_month == today.month,
+               JournalEntry.entry_day.between(today.day, last_day))
+        .order_by(JournalEntry.entry_date.desc())
+    )
+
+
+def on_this_day_json(user: User, today: Optional[date] = None) -> bytes:
+    """``today`` defaults to the user's local date, so the cached result lasts until their midnight."""
+    today = today or user.local_today()
+    key = ("on_this_day", user.id, user.data_version, today)
+    data = journal_cache.get(key)
+    if data is None:
+        entries = [
+            {"id": r.id, "date": r.entry_date.isoformat(), "years_ago": today.year - r.entry_date.year,
+             "title": r.title or "", "excerpt": r.excerpt or "", "word_count": r.word_count}
+            for r in db.session.execute(on_this_day_query(user.id, today))
+            if r.entry_date.year < today.year
+        ]
+        data = json.dumps({"date": today.isoformat(), "entries": entries}, separators=(",", ":")).encode()
+        journal_cache.set(key, data)
+    return data
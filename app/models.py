@@ -1,11 +1,13 @@
 from __future__ import annotations
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func, Enum
 
+from .compression import CompressedText
 from .extensions import db
 
 
@@ -18,6 +20,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     avatar_url = db.Column(db.String(500), nullable=True)
     timezone = db.Column(db.String(100), nullable=True)
+    data_version = db.Column(db.Integer, default=0, nullable=False)  # bumped on writes; keys app/cache.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     habits = db.relationship("Habit", backref="user", lazy=True, cascade="all, delete-orphan")
@@ -36,6 +39,14 @@ class User(UserMixin, db.Model):
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    def local_today(self) -> date:
+        """Today's date in the user's timezone (UTC when unset or unknown)."""
+        try:
+            tz = ZoneInfo(self.timezone) if self.timezone else timezone.utc
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = timezone.utc
+        return datetime.now(tz).date()
+
 
 class Habit(db.Model):
     __tablename__ = "habits"
@@ -45,6 +56,7 @@ class Habit(db.Model):
     name = db.Column(db.String(120), nullable=False)
     frequency = db.Column(db.String(50), nullable=False, default="daily")  # daily, weekly, custom
     custom_days = db.Column(db.String(20), nullable=True)  # e.g. "1,3,5" for Mon,Wed,Fri (0=Sun)
+    weekday_mask = db.Column(db.Integer, nullable=False, default=0b1111111)  # derived, see app/scheduling.py
     category = db.Column(db.String(50), nullable=True)  # Trading, Learning, Fitness, Personal
     color = db.Column(db.String(20), nullable=True, default="#0d6efd")
     icon = db.Column(db.String(50), nullable=True)
@@ -54,6 +66,10 @@ class Habit(db.Model):
 
     logs = db.relationship("HabitLog", backref="habit", lazy=True, cascade="all, delete-orphan")
     reminders = db.relationship("Reminder", backref="habit", lazy=True, cascade="all, delete-orphan")
+    stats = db.relationship("HabitStats", backref="habit", lazy=True, uselist=False, cascade="all, delete-orphan")
+    year_bits = db.relationship("HabitYearBits", backref="habit", lazy=True, cascade="all, delete-orphan")
+
+    __table_args__ = (db.Index("ix_habits_user_schedule", "user_id", "start_date", "end_date"),)
 
 
 class HabitLog(db.Model):
@@ -66,7 +82,39 @@ class HabitLog(db.Model):
     completed = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
-    __table_args__ = (db.UniqueConstraint("user_id", "habit_id", "log_date", name="uq_habit_log_once_per_day"),)
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "habit_id", "log_date", name="uq_habit_log_once_per_day"),
+        db.Index("ix_habit_logs_user_date", "user_id", "log_date", "habit_id", "completed"),
+    )
+
+
+class HabitStats(db.Model):
+    """Materialized per-habit streak/count summary, maintained on every HabitLog write."""
+
+    __tablename__ = "habit_stats"
+
+    habit_id = db.Column(db.Integer, db.ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    current_streak = db.Column(db.Integer, default=0, nullable=False)  # length of the run ending at last_completed_date
+    longest_streak = db.Column(db.Integer, default=0, nullable=False)
+    last_completed_date = db.Column(db.Date, nullable=True)
+    total_completions = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def current_as_of(self, day: date) -> int:
+        """Current streak on ``day``; a run that did not reach ``day`` has ended."""
+        return self.current_streak if self.last_completed_date == day else 0
+
+
+class HabitYearBits(db.Model):
+    """Completion bitmap for one habit and year; bit N (little-endian) is day-of-year N + 1."""
+
+    __tablename__ = "habit_year_bits"
+
+    habit_id = db.Column(db.Integer, db.ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    bits = db.Column(db.LargeBinary(46), nullable=False)  # 368 bits >= 366 days
 
 
 class JournalEntry(db.Model):
@@ -76,9 +124,27 @@ class JournalEntry(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     entry_date = db.Column(db.Date, index=True, nullable=False, default=date.today)
     title = db.Column(db.String(200), nullable=True)
-    content = db.Column(db.Text, nullable=True)  # rich HTML
+    content = db.Column(CompressedText(), nullable=True)  # rich HTML
+    # Plaintext figures for listings and stats, kept in sync by app.journal_fields
+    excerpt = db.Column(db.String(210), nullable=True)
+    plaintext_len = db.Column(db.Integer, nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    # Copies of entry_date's month and day, for the "on this day" lookup across years
+    entry_month = db.Column(db.SmallInteger, nullable=False)
+    entry_day = db.Column(db.SmallInteger, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Bumped by the ORM on every UPDATE, which only applies if the row is still
+    # at the version it was read at (StaleDataError otherwise); see journal autosave
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+
+    # (entry_date, id) is the journal list's keyset order
+    __table_args__ = (
+        db.Index("ix_journal_entries_user_date", "user_id", "entry_date", "id"),
+        db.Index("ix_journal_entries_user_month_day", "user_id", "entry_month", "entry_day"),
+        db.UniqueConstraint("user_id", "entry_date", name="uq_journal_entry_once_per_day"),
+    )
+    __mapper_args__ = {"version_id_col": version}
 
 
 class Category(db.Model):
@@ -99,7 +165,7 @@ class Subpage(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=True)  # rich HTML (Quill)
+    content = db.Column(CompressedText(), nullable=True)  # rich HTML (Quill)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -126,9 +192,14 @@ class TodoItem(db.Model):
     label = db.Column(db.String(255), nullable=False)
     kind = db.Column(db.String(20), nullable=False, default="todo")  # todo or not_todo
     is_done = db.Column(db.Boolean, default=False, nullable=False)
-    position = db.Column(db.Integer, default=0, nullable=False)
+    position = db.Column(db.String(32), default="i", nullable=False)  # rank key, see app.ranking
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # Matches the list ordering so keyset pages are index range scans
+    __table_args__ = (
+        db.Index("ix_todo_items_user_kind_order", "user_id", "kind", "is_done", "position", "created_at", "id"),
+    )
+
 
 class Reminder(db.Model):
     __tablename__ = "reminders"
@@ -143,6 +214,8 @@ class Reminder(db.Model):
     enabled = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (db.Index("ix_reminders_enabled", "enabled", "when_time"),)
+
 
 class UserTask(db.Model):
     __tablename__ = "user_tasks"
@@ -152,11 +225,15 @@ class UserTask(db.Model):
     task_type = db.Column(db.String(10), nullable=False)  # 'do' or 'dont'
     task_text = db.Column(db.String(255), nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
-    position = db.Column(db.Integer, default=0, nullable=False)
+    position = db.Column(db.String(32), default="i", nullable=False)  # rank key, see app.ranking
+    slot = db.Column(db.Integer, nullable=False)  # stable bit in DailyScore.task_mask, never reused
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    __table_args__ = (db.UniqueConstraint("user_id", "task_type", "position", name="uq_user_task_position"),)
+    __table_args__ = (
+        db.Index("ix_user_tasks_user_type_position", "user_id", "task_type", "position"),
+        db.UniqueConstraint("user_id", "slot", name="uq_user_task_slot"),
+    )
 
 
 class DailyScore(db.Model):
@@ -172,6 +249,7 @@ class DailyScore(db.Model):
     total_points = db.Column(db.Integer, default=0, nullable=False)  # calculated field
     journal_text = db.Column(db.Text, nullable=True)  # what user learned
     learning_text = db.Column(db.Text, nullable=True)  # mistakes/learnings today
+    task_mask = db.Column(db.LargeBinary, nullable=True)  # bit N = task with UserTask.slot N was checked
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -184,26 +262,50 @@ class DailyScore(db.Model):
 
     def get_score_color(self):
         """Get color based on total points"""
-        if self.total_points >= 7:
+        return self.color_for(self.total_points)
+
+    @staticmethod
+    def color_for(total_points: int) -> str:
+        if total_points >= 7:
             return "green"
-        elif self.total_points >= 4:
+        elif total_points >= 4:
             return "yellow"
         else:
             return "red"
 
 
+class DailyScoreMonth(db.Model):
+    """Per-month rollup of daily_scores, maintained whenever a day is submitted."""
+
+    __tablename__ = "daily_score_months"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    days_scored = db.Column(db.Integer, default=0, nullable=False)
+    total_points = db.Column(db.Integer, default=0, nullable=False)
+    best_points = db.Column(db.Integer, default=0, nullable=False)
+    green_days = db.Column(db.Integer, default=0, nullable=False)  # same buckets as DailyScore.get_score_color
+    yellow_days = db.Column(db.Integer, default=0, nullable=False)
+    red_days = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    @property
+    def avg_points(self) -> float:
+        return round(self.total_points / self.days_scored, 1) if self.days_scored else 0.0
+
+    def get_score_color(self):
+        """Color of the month's average, on the same scale as a single day"""
+        if not self.days_scored:
+            return "gray"
+        if self.avg_points >= 7:
+            return "green"
+        elif self.avg_points >= 4:
+            return "yellow"
+        return "red"
+
+
 def get_user_streak(user_id: int, habit_id: int) -> int:
-    today = date.today()
-    streak = 0
-    cur = today
-    while True:
-        log = (
-            HabitLog.query.filter_by(user_id=user_id, habit_id=habit_id, log_date=cur, completed=True)
-            .first()
-        )
-        if log:
-            streak += 1
-            cur = cur.fromordinal(cur.toordinal() - 1)
-        else:
-            break
-    return streak
\ No newline at end of file
+    from .streaks import streak_for_habit
+
+    return streak_for_habit(user_id, habit_id)[0]
@@ -0,0 +1,29 @@
+"""Opaque cursors for keyset pagination."""
+import base64
+import json
+from datetime import date, datetime
+
+from werkzeug.exceptions import BadRequest
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row on a page into a URL-safe token."""
+    raw = json.dumps(values, default=_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list:
+    """Unpack a token from :func:`encode_cursor`; raises 400 when it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise BadRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise BadRequest("Invalid cursor")
+    return values
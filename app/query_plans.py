@@ -0,0 +1,99 @@
+"""EXPLAIN the hot route queries and flag any that fall back to a full table scan.
+
+Run with ``flask query-plans check`` (exits non-zero on a regression). The
+statements mirror what the routes execute; where a route builds its query
+through a shared helper, that helper is used directly so the check cannot
+drift from the code.
+"""
+from __future__ import annotations
+import re
+from datetime import date, datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy import select, tuple_, or_
+
+from .extensions import db
+from .models import DailyScore, DailyScoreMonth, Habit, JournalEntry, Reminder, TodoItem
+from .scheduling import due_on
+
+
+class PlanResult(NamedTuple):
+    name: str
+    full_scans: list[str]
+    plan: list[str]
+
+
+def _hot_queries(user_id: int, today: date) -> dict[str, Callable]:
+    from .api.routes import TODO_ORDER
+    from .dashboard.snapshot import _snapshot_query
+    from .journal.routes import listing_query
+    from .journal_stats import heatmap_query, on_this_day_query, writing_stats_query
+    from .streaks import _streak_query
+
+    return {
+        "dashboard.index snapshot": lambda: _snapshot_query(user_id, today),
+        "habit streaks": lambda: _streak_query(user_id).params(today_day=0),
+        "api.list_todos page": lambda: (
+            select(TodoItem)
+            .where(TodoItem.user_id == user_id, TodoItem.kind == "todo",
+                   tuple_(*TODO_ORDER) > tuple_(False, "i", datetime(2000, 1, 1), 0))
+            .order_by(*TODO_ORDER)
+            .limit(21)
+        ),
+        "journal.journal_index": lambda: listing_query(user_id, after=(today, 1 << 30)),
+        "journal.journal_day": lambda: (
+            select(JournalEntry).where(JournalEntry.user_id == user_id, JournalEntry.entry_date == today).limit(1)
+        ),
+        "api.journal_heatmap": lambda: heatmap_query(user_id, today),
+        "api.journal_writing_stats": lambda: writing_stats_query(user_id, today.year),
+        "api.journal_on_this_day": lambda: on_this_day_query(user_id, today),
+        "tasks.calendar month": lambda: (
+            select(DailyScore)
+            .where(DailyScore.user_id == user_id, DailyScore.date >= today.replace(day=1), DailyScore.date <= today)
+        ),
+        "tasks.calendar overview rollups": lambda: (
+            select(DailyScoreMonth)
+            .where(DailyScoreMonth.user_id == user_id,
+                   tuple_(DailyScoreMonth.year, DailyScoreMonth.month) >= tuple_(today.year, 1))
+        ),
+        "tasks.day_details": lambda: (
+            select(DailyScore).where(DailyScore.user_id == user_id, DailyScore.date == today).limit(1)
+        ),
+        "jobs.check_and_send_reminders": lambda: (
+            select(Reminder, Habit)
+            .outerjoin(Habit, Reminder.habit_id == Habit.id)
+            .where(Reminder.enabled.is_(True), or_(Reminder.habit_id.is_(None), due_on(today)))
+        ),
+    }
+
+
+def _explain(stmt) -> list[str]:
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect)
+    if conn.dialect.name == "sqlite":
+        sql, rows_col = "EXPLAIN QUERY PLAN " + str(compiled), -1
+    else:
+        # Small tables would make the planner prefer seq scans regardless of indexes
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        sql, rows_col = "EXPLAIN " + str(compiled), 0
+    params = tuple(compiled.params[k] for k in compiled.positiontup) if compiled.positional else compiled.params
+    return [str(row[rows_col]) for row in conn.exec_driver_sql(sql, params)]
+
+
+def _full_scans(plan: list[str], dialect: str) -> list[str]:
+    tables = set(db.metadata.tables)
+    pattern = re.compile(r"\bSCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$") if dialect == "sqlite" else re.compile(r"Seq Scan on (\w+)")
+    return [line.strip() for line in plan if (m := pattern.search(line.strip())) and m.group(1) in tables]
+
+
+def check_plans(user_id: int = 1, today: date | None = None) -> list[PlanResult]:
+    today = today or date.today()
+    dialect = db.session.connection().dialect.name
+    results = []
+    try:
+        for name, build in _hot_queries(user_id, today).items():
+            plan = _explain(build())
+            results.append(PlanResult(name, _full_scans(plan, dialect), plan))
+    finally:
+        db.session.rollback()
+    return results
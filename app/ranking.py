@@ -0,0 +1,138 @@
+"""Lexicographic rank keys for user-ordered lists (UserTask, TodoItem).
+
+A position is a short base-36 string; a new key can always be generated
+strictly between two neighbours, so moving an item is one UPDATE of that
+item's row. Keys grow by a character when the gap runs out; a move that
+would exceed MAX_RANK_LENGTH respaces its list, and the nightly
+``rebalance_long_ranks`` job catches lists whose keys grew some other way.
+"""
+from __future__ import annotations
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select, update
+
+from .extensions import db
+
+
+# Digits then lowercase letters: the same order under byte and locale collations
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(ALPHABET)
+MIDDLE = ALPHABET[BASE // 2]
+MAX_RANK_LENGTH = 12
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """A key sorting strictly after ``before`` and before ``after`` (either may be None)."""
+    before = before or ""
+    if after is not None and before >= after:
+        raise ValueError(f"no rank between {before!r} and {after!r}")
+    n = 0
+    if after is not None:
+        while n < len(after) and (before[n] if n < len(before) else ALPHABET[0]) == after[n]:
+            n += 1
+    prefix = after[:n] if after is not None else ""
+    lo = ALPHABET.index(before[n]) if n < len(before) else 0
+    hi = ALPHABET.index(after[n]) if after is not None and n < len(after) else BASE
+    if hi - lo > 1:
+        return prefix + ALPHABET[(lo + hi) // 2]
+    # Adjacent digits: keep the lower one and go one level deeper
+    return prefix + ALPHABET[lo] + rank_between(before[n + 1:], None)
+
+
+def spread_ranks(count: int) -> list[str]:
+    """``count`` evenly spaced keys of equal, minimal length."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(ALPHABET[digit])
+        ranks.append("".join(reversed(digits)).rstrip(ALPHABET[0]))
+    return ranks
+
+
+def last_rank(model, *scope) -> str:
+    """Key for appending a row after every existing row in ``scope``."""
+    current = db.session.execute(select(func.max(model.position)).where(*scope)).scalar()
+    return rank_between(current, None)
+
+
+def rebalance(model, *scope) -> int:
+    """Respace the keys of every row in ``scope`` in their current order."""
+    ids = db.session.execute(select(model.id).where(*scope).order_by(model.position, model.id)).scalars().all()
+    if ids:
+        db.session.execute(
+            update(model),
+            [{"id": row_id, "position": rank} for row_id, rank in zip(ids, spread_ranks(len(ids)))],
+        )
+    return len(ids)
+
+
+class RankConflict(ValueError):
+    """The requested neighbours are not adjacent in that order (the client's list is stale)."""
+
+
+def neighbour_ids(payload: dict) -> tuple[Optional[int], Optional[int]]:
+    """``before_id``/``after_id`` from a move request; raises ValueError unless each is an int or null."""
+    ids = payload.get("before_id"), payload.get("after_id")
+    if any(value is not None and (not isinstance(value, int) or isinstance(value, bool)) for value in ids):
+        raise ValueError("before_id and after_id must be integers or null")
+    return ids
+
+
+def move_between(item, scope: Sequence, before_id: Optional[int], after_id: Optional[int]) -> str:
+    """Give ``item`` a key between the rows ``before_id`` and ``after_id`` of its list.
+
+    Either neighbour may be omitted to move to the start or end. If the
+    neighbours' keys leave no gap (duplicate keys), the list is respaced
+    first. RankConflict is raised, leaving the caller to roll back, when a
+    neighbour is not in ``scope`` (deleted, or someone else's) or
+    ``before_id`` still sorts after ``after_id``: the client's list is stale.
+    A new key longer than MAX_RANK_LENGTH respaces the list straight away,
+    so keys stay well inside the column however often an item is moved.
+    """
+    model = type(item)
+    for attempt in range(2):
+        ranks = dict(db.session.execute(
+            select(model.id, model.position).where(*scope, model.id.in_([before_id, after_id]))
+        ).all())
+        missing = [row_id for row_id in (before_id, after_id) if row_id is not None and row_id not in ranks]
+        if missing:
+            raise RankConflict(f"row {missing[0]} is not in this list")
+        try:
+            item.position = rank_between(ranks.get(before_id), ranks.get(after_id))
+        except ValueError:
+            if attempt:
+                raise RankConflict(f"row {before_id} does not sort before row {after_id}") from None
+            rebalance(model, *scope)
+            db.session.expire(item, ["position"])
+            continue
+        if len(item.position) > MAX_RANK_LENGTH:
+            db.session.flush()  # respace with the item already in its new place
+            rebalance(model, *scope)
+            db.session.expire(item, ["position"])
+        return item.position
+
+
+def rebalance_long_ranks() -> int:
+    """Respace every list holding a key longer than MAX_RANK_LENGTH; returns lists rebalanced."""
+    from .models import TodoItem, UserTask
+
+    groups = [
+        (UserTask, (UserTask.user_id, UserTask.task_type)),
+        (TodoItem, (TodoItem.user_id, TodoItem.kind)),
+    ]
+    rebalanced = 0
+    for model, columns in groups:
+        keys = db.session.execute(
+            select(*columns).group_by(*columns).having(func.max(func.length(model.position)) > MAX_RANK_LENGTH)
+        ).all()
+        for key in keys:
+            rebalance(model, *(column == value for column, value in zip(columns, key)))
+            rebalanced += 1
+    db.session.commit()
+    return rebalanced
@@ -0,0 +1,83 @@
+"""Which habits are due on a given date.
+
+``Habit.weekday_mask`` is derived from ``frequency``/``custom_days`` whenever a
+habit is saved (bit N set = due on weekday N, 0=Sun..6=Sat, the convention the
+forms use), so "due today" is a single SQL predicate together with the
+start/end date range. Weekly habits are due every day of a Sunday-based week
+until they are completed in it.
+"""
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, exists, or_, event
+from sqlalchemy.orm import aliased
+
+from .models import Habit, HabitLog
+
+
+ALL_DAYS = 0b1111111
+
+
+def sunday_weekday(day: date) -> int:
+    """Weekday number with 0=Sun..6=Sat."""
+    return (day.weekday() + 1) % 7
+
+
+def parse_days(value: Optional[str]) -> int:
+    mask = 0
+    for part in (value or "").split(","):
+        part = part.strip()
+        if part.isdigit() and int(part) < 7:
+            mask |= 1 << int(part)
+    return mask
+
+
+def weekday_mask(frequency: Optional[str], custom_days: Optional[str]) -> int:
+    """Weekday bitmask for a habit.
+
+    Custom habits use their listed days. Daily and weekly habits can fall on
+    any day (see :func:`due_on` for when a weekly one drops off). A custom
+    habit without valid days is treated as daily rather than never due.
+    """
+    if frequency == "custom":
+        return parse_days(custom_days) or ALL_DAYS
+    return ALL_DAYS
+
+
+def week_start(day: date) -> date:
+    """The Sunday on or before ``day``."""
+    return day - timedelta(days=sunday_weekday(day))
+
+
+def due_on(day: date):
+    """SQL predicate selecting habits due on ``day``.
+
+    A weekly habit completed earlier in the week is not due again until the
+    next Sunday; completed today it still counts as due, so it shows as done.
+    """
+    log = aliased(HabitLog)  # callers may already select from habit_logs
+    done_this_week = exists().where(
+        log.user_id == Habit.user_id,
+        log.habit_id == Habit.id,
+        log.log_date >= week_start(day),
+        log.log_date < day,
+        log.completed.is_(True),
+    )
+    return and_(
+        Habit.weekday_mask.op("&")(1 << sunday_weekday(day)) != 0,
+        or_(Habit.start_date.is_(None), Habit.start_date <= day),
+        or_(Habit.end_date.is_(None), Habit.end_date >= day),
+        or_(Habit.frequency != "weekly", ~done_this_week),
+    )
+
+
+def due_habits(user_id: int, day: Optional[date] = None) -> list[Habit]:
+    day = day or date.today()
+    return Habit.query.filter(Habit.user_id == user_id, due_on(day)).order_by(Habit.id).all()
+
+
+@event.listens_for(Habit, "before_insert")
+@event.listens_for(Habit, "before_update")
+def _set_weekday_mask(mapper, connection, target: Habit) -> None:
+    target.weekday_mask = weekday_mask(target.frequency, target.custom_days)
@@ -0,0 +1,71 @@
+"""Maintenance of the daily_score_months rollup.
+
+A month row is recomputed from its daily_scores with one grouped query and
+upserted each time a day in it is written, so it never drifts by more than
+the write in flight. ``rebuild_score_months`` regenerates the whole table.
+"""
+from __future__ import annotations
+from calendar import monthrange
+from datetime import date, datetime
+
+from sqlalchemy import case, delete, extract, func, select, tuple_
+
+from .extensions import db
+from .models import DailyScore, DailyScoreMonth
+from .sqlutil import dialect_insert
+
+
+def _aggregates():
+    points = DailyScore.total_points
+    return (
+        func.count().label("days_scored"),
+        func.coalesce(func.sum(points), 0).label("total_points"),
+        func.coalesce(func.max(points), 0).label("best_points"),
+        func.coalesce(func.sum(case((points >= 7, 1), else_=0)), 0).label("green_days"),
+        func.coalesce(func.sum(case((points.between(4, 6), 1), else_=0)), 0).label("yellow_days"),
+        func.coalesce(func.sum(case((points < 4, 1), else_=0)), 0).label("red_days"),
+    )
+
+
+def refresh_month(user_id: int, year: int, month: int) -> None:
+    """Recompute one month's rollup row from daily_scores.
+
+    Written as an upsert so two workers saving the first day of a month
+    cannot both try to insert the row.
+    """
+    first = date(year, month, 1)
+    last = date(year, month, monthrange(year, month)[1])
+    totals = db.session.execute(
+        select(*_aggregates()).where(DailyScore.user_id == user_id, DailyScore.date.between(first, last))
+    ).one()._asdict()
+    totals["updated_at"] = datetime.utcnow()
+    stmt = dialect_insert(db.session, DailyScoreMonth).values(user_id=user_id, year=year, month=month, **totals)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[DailyScoreMonth.user_id, DailyScoreMonth.year, DailyScoreMonth.month],
+        set_={key: getattr(stmt.excluded, key) for key in totals},
+    ))
+
+
+def months_between(user_id: int, first: date, last: date) -> dict[tuple[int, int], DailyScoreMonth]:
+    """Rollup rows for every month from ``first`` to ``last`` keyed by (year, month)."""
+    key = tuple_(DailyScoreMonth.year, DailyScoreMonth.month)
+    rows = DailyScoreMonth.query.filter(
+        DailyScoreMonth.user_id == user_id,
+        key >= tuple_(first.year, first.month),
+        key <= tuple_(last.year, last.month),
+    ).all()
+    return {(r.year, r.month): r for r in rows}
+
+
+def rebuild_score_months() -> int:
+    """Regenerate daily_score_months from daily_scores; returns the number of months written."""
+    year = extract("year", DailyScore.date)
+    month = extract("month", DailyScore.date)
+    grouped = db.session.execute(
+        select(DailyScore.user_id, year.label("year"), month.label("month"), *_aggregates())
+        .group_by(DailyScore.user_id, year, month)
+    ).all()
+    db.session.execute(delete(DailyScoreMonth))
+    db.session.add_all(DailyScoreMonth(**{k: int(v) for k, v in row._mapping.items()}) for row in grouped)
+    db.session.commit()
+    return len(grouped)
@@ -0,0 +1,181 @@
+"""Trend statistics over a user's daily scores.
+
+Rolling means use a ``RANGE`` window over day numbers where the database
+supports offset frames (PostgreSQL 11+, SQLite 3.28+), and a cumulative-sum
+pass in Python otherwise. Percentiles come from a GROUP BY histogram, since
+points are small integers. Results are cached per user, keyed by the same
+count/max(updated_at) validator as the heatmap, so any score write
+invalidates them.
+"""
+from __future__ import annotations
+import json
+import sqlite3
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Optional
+
+from sqlalchemy import case, extract, func, select
+
+from .cache import LRUCache
+from .extensions import db
+from .models import DailyScore
+from .sqlutil import day_number
+
+
+WINDOWS = (7, 30, 90)
+SERIES_DAYS = 90
+PERCENTILES = (10, 25, 50, 75, 90)
+WEEKDAYS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+DEFAULT_THRESHOLD = 7  # green days, as in DailyScore.get_score_color
+
+stats_cache = LRUCache(4 * 1024 * 1024)
+
+
+def _supports_range_windows() -> bool:
+    dialect = db.session.get_bind().dialect
+    if dialect.name == "postgresql":
+        return (dialect.server_version_info or (0,)) >= (11,)
+    if dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 28, 0)
+    return False
+
+
+def _rolling_sql(user_id: int, start: date, series_start: date) -> list[dict]:
+    day = day_number(DailyScore.date)
+    rows = db.session.execute(
+        select(
+            DailyScore.date,
+            DailyScore.total_points,
+            *(func.avg(DailyScore.total_points).over(order_by=day, range_=(-(w - 1), 0)).label(f"avg_{w}")
+              for w in WINDOWS),
+        )
+        .where(DailyScore.user_id == user_id, DailyScore.date >= start)
+        .order_by(DailyScore.date)
+    ).all()
+    return [
+        {"date": r.date.isoformat(), "points": r.total_points,
+         **{f"avg_{w}": round(float(getattr(r, f"avg_{w}")), 2) for w in WINDOWS}}
+        for r in rows if r.date >= series_start
+    ]
+
+
+def _rolling_python(user_id: int, start: date, series_start: date, today: date) -> list[dict]:
+    rows = db.session.execute(
+        select(DailyScore.date, DailyScore.total_points)
+        .where(DailyScore.user_id == user_id, DailyScore.date >= start)
+        .order_by(DailyScore.date)
+    ).all()
+    n = max((today - start).days + 1, max((r.date - start).days + 1 for r in rows) if rows else 0)
+    points, scored = [0] * n, [0] * n
+    for r in rows:
+        points[(r.date - start).days] = r.total_points
+        scored[(r.date - start).days] = 1
+    sums = [0] + list(accumulate(points))
+    counts = [0] + list(accumulate(scored))
+    series = []
+    for r in rows:
+        if r.date < series_start:
+            continue
+        i = (r.date - start).days + 1
+        item = {"date": r.date.isoformat(), "points": r.total_points}
+        for w in WINDOWS:
+            lo = max(i - w, 0)
+            item[f"avg_{w}"] = round((sums[i] - sums[lo]) / (counts[i] - counts[lo]), 2)
+        series.append(item)
+    return series
+
+
+def _percentiles(histogram: list[tuple[int, int]]) -> dict[str, Optional[int]]:
+    """Nearest-rank percentiles from (points, days) pairs sorted by points."""
+    total = sum(days for _, days in histogram)
+    result = {}
+    for p in PERCENTILES:
+        rank = max(1, -(-p * total // 100))  # ceil(p/100 * total)
+        seen, value = 0, None
+        for points, days in histogram:
+            seen += days
+            if seen >= rank:
+                value = points
+                break
+        result[f"p{p}"] = value if total else None
+    return result
+
+
+def _best_streak(user_id: int, threshold: int) -> dict:
+    """Longest run of consecutive days scoring at least ``threshold`` (gaps and islands)."""
+    day = day_number(DailyScore.date)
+    runs = (
+        select(
+            DailyScore.date,
+            (day - func.row_number().over(order_by=DailyScore.date)).label("island"),
+        )
+        .where(DailyScore.user_id == user_id, DailyScore.total_points >= threshold)
+        .subquery()
+    )
+    best = db.session.execute(
+        select(func.count().label("length"), func.min(runs.c.date).label("start"), func.max(runs.c.date).label("end"))
+        .group_by(runs.c.island)
+        .order_by(func.count().desc(), func.max(runs.c.date).desc())
+        .limit(1)
+    ).first()
+    if best is None:
+        return {"threshold": threshold, "length": 0, "start": None, "end": None}
+    return {"threshold": threshold, "length": best.length, "start": best.start.isoformat(), "end": best.end.isoformat()}
+
+
+def compute_stats(user_id: int, today: date, threshold: int = DEFAULT_THRESHOLD) -> dict:
+    series_start = today - timedelta(days=SERIES_DAYS - 1)
+    window_start = series_start - timedelta(days=max(WINDOWS) - 1)
+    if _supports_range_windows():
+        series = _rolling_sql(user_id, window_start, series_start)
+    else:
+        series = _rolling_python(user_id, window_start, series_start, today)
+
+    points = DailyScore.total_points
+    current = db.session.execute(
+        select(*(
+            func.avg(case((DailyScore.date > today - timedelta(days=w), points))).label(f"avg_{w}")
+            for w in WINDOWS
+        ), func.count().label("days"), func.avg(points).label("mean"))
+        .where(DailyScore.user_id == user_id, DailyScore.date <= today)
+    ).one()
+
+    histogram = db.session.execute(
+        select(points, func.count()).where(DailyScore.user_id == user_id).group_by(points).order_by(points)
+    ).all()
+
+    dow = extract("dow", DailyScore.date)
+    weekdays = {int(d): (n, avg) for d, n, avg in db.session.execute(
+        select(dow, func.count(), func.avg(points)).where(DailyScore.user_id == user_id).group_by(dow)
+    )}
+
+    def rounded(value):
+        return round(float(value), 2) if value is not None else None
+
+    return {
+        "today": today.isoformat(),
+        "days_scored": current.days,
+        "mean": rounded(current.mean),
+        "rolling": {str(w): rounded(getattr(current, f"avg_{w}")) for w in WINDOWS},
+        "series": series,
+        "percentiles": _percentiles([(int(p), n) for p, n in histogram]),
+        "histogram": {int(p): n for p, n in histogram},
+        "best_streak": _best_streak(user_id, threshold),
+        "weekdays": [
+            {"weekday": name, "days": weekdays.get(i, (0, None))[0], "mean": rounded(weekdays.get(i, (0, None))[1])}
+            for i, name in enumerate(WEEKDAYS)
+        ],
+    }
+
+
+def stats_json(user_id: int, today: Optional[date] = None, threshold: int = DEFAULT_THRESHOLD) -> str:
+    today = today or date.today()
+    latest, count = db.session.execute(
+        select(func.max(DailyScore.updated_at), func.count()).where(DailyScore.user_id == user_id)
+    ).one()
+    key = (user_id, latest, count, today, threshold)
+    data = stats_cache.get(key)
+    if data is None:
+        data = json.dumps(compute_stats(user_id, today, threshold))
+        stats_cache.set(key, data)
+    return data
@@ -0,0 +1,37 @@
+"""Small SQL helpers that need to compile differently on SQLite and PostgreSQL."""
+from sqlalchemy import Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class day_number(FunctionElement):
+    """Whole days since 1970-01-01 for a DATE column.
+
+    Consecutive dates map to consecutive integers, which is what the
+    gaps-and-islands queries rely on.
+    """
+
+    type = Integer()
+    inherit_cache = True
+    name = "day_number"
+
+
+@compiles(day_number)
+def _day_number_default(element, compiler, **kw):
+    return "(%s - DATE '1970-01-01')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_number, "sqlite")
+def _day_number_sqlite(element, compiler, **kw):
+    return "CAST(julianday(%s) - 2440587.5 AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+
+def dialect_insert(session, entity):
+    """INSERT for the session's dialect, exposing ``on_conflict_do_*`` on SQLite and PostgreSQL."""
+    name = session.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(entity)
+    if name == "sqlite":
+        return sqlite.insert(entity)
+    raise NotImplementedError(f"No upsert support for the {name} dialect")
@@ -96,11 +96,12 @@
         .then(()=> location.reload());
     });
   });
-  document.querySelectorAll('.todo-toggle').forEach(chk=>{
-    chk.addEventListener('change', ()=>{
-      const csrf = document.querySelector('meta[name=csrf-token]')?.content || '';
-      fetch(`/api/todos/${chk.dataset.id}/toggle`, {method:'POST', headers:{'X-CSRFToken': csrf}})
-        .then(()=> location.reload());
-    });
+  // Delegated so items appended by "Show All" paging are covered too
+  document.addEventListener('change', (evt)=>{
+    const chk = evt.target.closest('.todo-toggle');
+    if (!chk) return;
+    const csrf = document.querySelector('meta[name=csrf-token]')?.content || '';
+    fetch(`/api/todos/${chk.dataset.id}/toggle`, {method:'POST', headers:{'X-CSRFToken': csrf}})
+      .then(()=> location.reload());
   });
 })();
\ No newline at end of file
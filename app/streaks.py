@@ -0,0 +1,183 @@
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select, func, case, bindparam
+
+from . import bitsets
+from .extensions import db
+from .models import Habit, HabitLog, HabitStats
+from .sqlutil import day_number
+
+
+EPOCH = date(1970, 1, 1)
+
+
+class StreakRow(NamedTuple):
+    habit_id: int
+    current: int  # run ending today
+    longest: int
+    total: int
+    last_completed_date: Optional[date]
+    tail: int  # run ending at last_completed_date
+
+
+def _streak_query(user_id: Optional[int] = None, habit_id: Optional[int] = None):
+    """Current and longest streak per habit as a single gaps-and-islands query.
+
+    Completed days of one habit that are consecutive share the same
+    ``day - row_number()`` value, so grouping on it yields one row per run.
+    The current streak is the run that ends today (same rule as the old
+    day-by-day loop: nothing logged today means a current streak of 0).
+    """
+    day = day_number(HabitLog.log_date)
+    days = select(
+        HabitLog.habit_id.label("habit_id"),
+        day.label("day"),
+        (day - func.row_number().over(partition_by=HabitLog.habit_id, order_by=HabitLog.log_date)).label("grp"),
+    ).where(HabitLog.completed.is_(True))
+    if user_id is not None:
+        days = days.where(HabitLog.user_id == user_id)
+    if habit_id is not None:
+        days = days.where(HabitLog.habit_id == habit_id)
+    days = days.subquery("days")
+
+    runs = (
+        select(
+            days.c.habit_id,
+            func.count().label("length"),
+            func.max(days.c.day).label("last_day"),
+            func.max(func.max(days.c.day)).over(partition_by=days.c.habit_id).label("habit_last_day"),
+        )
+        .group_by(days.c.habit_id, days.c.grp)
+        .subquery("runs")
+    )
+
+    return select(
+        runs.c.habit_id,
+        func.max(case((runs.c.last_day == bindparam("today_day"), runs.c.length), else_=0)).label("current"),
+        func.max(runs.c.length).label("longest"),
+        func.sum(runs.c.length).label("total"),
+        func.max(runs.c.last_day).label("last_day"),
+        func.max(case((runs.c.last_day == runs.c.habit_last_day, runs.c.length), else_=0)).label("tail"),
+    ).group_by(runs.c.habit_id)
+
+
+def compute_streaks(user_id: Optional[int] = None, habit_id: Optional[int] = None,
+                    today: Optional[date] = None) -> list[StreakRow]:
+    """Run the streak query straight against habit_logs."""
+    today = today or date.today()
+    rows = db.session.execute(_streak_query(user_id, habit_id), {"today_day": (today - EPOCH).days})
+    return [
+        StreakRow(r.habit_id, r.current, r.longest, r.total, EPOCH + timedelta(days=r.last_day), r.tail)
+        for r in rows
+    ]
+
+
+def streaks_for_user(user_id: int, today: Optional[date] = None) -> dict[int, tuple[int, int]]:
+    """Return ``{habit_id: (current, longest)}`` for every habit with at least one log."""
+    return {r.habit_id: (r.current, r.longest) for r in compute_streaks(user_id, today=today)}
+
+
+def streak_for_habit(user_id: int, habit_id: int, today: Optional[date] = None) -> tuple[int, int]:
+    rows = compute_streaks(user_id, habit_id, today)
+    return (rows[0].current, rows[0].longest) if rows else (0, 0)
+
+
+def stats_for_user(user_id: int, today: Optional[date] = None) -> dict[int, tuple[int, int]]:
+    """Same shape as :func:`streaks_for_user`, read from the habit_stats table."""
+    today = today or date.today()
+    rows = HabitStats.query.filter_by(user_id=user_id).all()
+    return {s.habit_id: (s.current_as_of(today), s.longest_streak) for s in rows}
+
+
+def _apply(stats: HabitStats, row: Optional[StreakRow]) -> None:
+    stats.current_streak = row.tail if row else 0
+    stats.longest_streak = row.longest if row else 0
+    stats.total_completions = row.total if row else 0
+    stats.last_completed_date = row.last_completed_date if row else None
+
+
+def refresh_habit_stats(user_id: int, habit_id: int) -> HabitStats:
+    """Recompute one habit's stats from habit_logs (pending changes are flushed first)."""
+    stats = db.session.get(HabitStats, habit_id)
+    if stats is None:
+        stats = HabitStats(habit_id=habit_id, user_id=user_id)
+        db.session.add(stats)
+    rows = compute_streaks(user_id, habit_id)
+    _apply(stats, rows[0] if rows else None)
+    return stats
+
+
+def refresh_user_habit_stats(user_id: int, habit_ids) -> None:
+    """Recompute stats for several of a user's habits with one streak query."""
+    habit_ids = set(habit_ids)
+    if not habit_ids:
+        return
+    computed = {r.habit_id: r for r in compute_streaks(user_id)}
+    existing = {
+        s.habit_id: s
+        for s in HabitStats.query.filter(HabitStats.habit_id.in_(habit_ids)).all()
+    }
+    for habit_id in habit_ids:
+        stats = existing.get(habit_id)
+        if stats is None:
+            stats = HabitStats(habit_id=habit_id, user_id=user_id)
+            db.session.add(stats)
+        _apply(stats, computed.get(habit_id))
+
+
+def record_habit_log(user_id: int, habit_id: int, log_date: date, completed: bool) -> HabitStats:
+    """Keep habit_stats in step with a HabitLog insert (completed) or delete.
+
+    Must be called in the same transaction as the HabitLog change. Checking
+    off a day after the last completed one is the common case and is applied
+    incrementally; anything else (unchecking, backfilling the past) falls
+    back to recomputing the habit with the streak query. The habit's year
+    bitmap is updated too when HABIT_BITSETS is on.
+    """
+    if bitsets.enabled():
+        bitsets.set_day(user_id, habit_id, log_date, completed)
+    stats = db.session.get(HabitStats, habit_id)
+    if stats is None or not completed or (stats.last_completed_date and log_date <= stats.last_completed_date):
+        return refresh_habit_stats(user_id, habit_id)
+    if stats.last_completed_date == log_date - timedelta(days=1):
+        stats.current_streak += 1
+    else:
+        stats.current_streak = 1
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+    stats.total_completions += 1
+    stats.last_completed_date = log_date
+    return stats
+
+
+def rebuild_habit_stats(check_only: bool = False) -> tuple[int, int]:
+    """Regenerate every habit_stats row from habit_logs.
+
+    Returns ``(rows_checked, rows_drifted)``. With ``check_only`` nothing is
+    written, which makes it usable as a drift monitor.
+    """
+    computed = {r.habit_id: r for r in compute_streaks()}
+    existing = {s.habit_id: s for s in HabitStats.query.all()}
+    checked = drifted = 0
+    for habit_id, user_id in db.session.execute(select(Habit.id, Habit.user_id)).all():
+        checked += 1
+        row = computed.get(habit_id)
+        stats = existing.get(habit_id)
+        expected = (row.tail, row.longest, row.total, row.last_completed_date) if row else (0, 0, 0, None)
+        actual = (
+            (stats.current_streak, stats.longest_streak, stats.total_completions, stats.last_completed_date)
+            if stats else None
+        )
+        if actual == expected or (actual is None and row is None):
+            continue
+        drifted += 1
+        if check_only:
+            continue
+        if stats is None:
+            stats = HabitStats(habit_id=habit_id, user_id=user_id)
+            db.session.add(stats)
+        _apply(stats, row)
+    if not check_only:
+        db.session.commit()
+    return checked, drifted
@@ -0,0 +1,95 @@
+"""Per-task check state for a day, stored as a bitmask on DailyScore.
+
+Every UserTask gets a ``slot`` when created that is never reused, even after
+the task is deleted, so bit ``slot`` of ``DailyScore.task_mask`` always means
+the same task. Masks are little-endian bytes, only as long as the highest
+checked slot needs.
+"""
+from __future__ import annotations
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import DailyScore, UserTask
+
+
+SLOT_ATTEMPTS = 5
+
+
+def next_slot(user_id: int):
+    """The user's next free slot as a scalar subquery, evaluated by the INSERT itself."""
+    return select(func.coalesce(func.max(UserTask.slot), -1) + 1).where(UserTask.user_id == user_id).scalar_subquery()
+
+
+def add_with_slot(task: UserTask) -> UserTask:
+    """Insert ``task`` with the user's next free slot.
+
+    The slot is read and written by one INSERT ... SELECT, which SQLite runs
+    atomically. On PostgreSQL two concurrent inserts can still read the same
+    max(slot); the loser fails on uq_user_task_slot inside a savepoint and
+    is retried, so neither request sees an error.
+    """
+    for attempt in range(SLOT_ATTEMPTS):
+        try:
+            with db.session.begin_nested():
+                task.slot = next_slot(task.user_id)
+                db.session.add(task)
+            return task
+        except IntegrityError:
+            if attempt == SLOT_ATTEMPTS - 1:
+                raise
+
+
+def encode_mask(slots: Iterable[int]) -> bytes:
+    value = 0
+    for slot in slots:
+        value |= 1 << slot
+    return value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+
+def decode_slots(mask: bytes | None) -> set[int]:
+    value = int.from_bytes(mask or b"", "little")
+    slots = set()
+    while value:
+        low = value & -value
+        slots.add(low.bit_length() - 1)
+        value ^= low
+    return slots
+
+
+def adherence(user_id: int, start: date, end: date) -> dict:
+    """How often each task was checked between ``start`` and ``end`` (inclusive).
+
+    Only the mask column is read; per-slot counts come from walking the set
+    bits of each day's mask, so no per-task rows are ever built.
+    """
+    masks = db.session.execute(
+        select(DailyScore.task_mask)
+        .where(DailyScore.user_id == user_id, DailyScore.date >= start, DailyScore.date <= end)
+    ).scalars().all()
+    counts: dict[int, int] = {}
+    for mask in masks:
+        for slot in decode_slots(mask):
+            counts[slot] = counts.get(slot, 0) + 1
+
+    days_scored = len(masks)
+    tasks = UserTask.query.filter_by(user_id=user_id, is_active=True).order_by(UserTask.task_type, UserTask.position)
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "days_scored": days_scored,
+        "tasks": [
+            {
+                "id": task.id,
+                "task_type": task.task_type,
+                "task_text": task.task_text,
+                "slot": task.slot,
+                "checked": counts.get(task.slot, 0),
+                "rate": round(counts.get(task.slot, 0) / days_scored, 4) if days_scored else 0.0,
+            }
+            for task in tasks
+        ],
+    }
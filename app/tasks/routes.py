@@ -1,14 +1,28 @@
+import base64
+import hashlib
+import json
 from datetime import date, datetime, timedelta
 from calendar import monthrange
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 
+from ..cache import bump_user_version
+from ..conditional import conditional
 from ..extensions import db
 from ..models import DailyScore, UserTask
+from ..score_rollup import months_between, refresh_month
+from ..score_stats import DEFAULT_THRESHOLD, stats_json
+from ..sqlutil import dialect_insert
 from ..forms import DailyTaskForm, UserTaskForm
+from ..ranking import RankConflict, last_rank, move_between, neighbour_ids
+from ..task_masks import add_with_slot, adherence, decode_slots, encode_mask
 from . import tasks_bp
 
 
+# Byte value for days without a DailyScore in the heatmap encoding
+SCORE_MISSING = 255
+
+
 @tasks_bp.route('/')
 @login_required
 def daily_tasks():
@@ -48,7 +62,8 @@ def daily_tasks():
                          today_score=today_score, 
                          today=today,
                          do_tasks=do_tasks,
-                         dont_tasks=dont_tasks)
+                         dont_tasks=dont_tasks,
+                         checked_slots=decode_slots(today_score.task_mask) if today_score else set())
 
 
 @tasks_bp.route('/submit', methods=['POST'])
@@ -64,40 +79,65 @@ def submit_daily_tasks():
         dont_points = 0
         
         # Count checked do tasks
+        checked_ids = set()
         for key, value in request.form.items():
             if key.startswith('do_task_') and value == 'on':
                 do_points += 1
             elif key.startswith('dont_task_') and value == 'on':
                 dont_points += 1
+            else:
+                continue
+            task_id = key.rsplit('_', 1)[1]
+            if task_id.isdigit():
+                checked_ids.add(int(task_id))
+
+        # Remember which tasks were checked, one bit per task slot
+        slots = db.session.execute(
+            db.select(UserTask.slot).where(UserTask.user_id == current_user.id, UserTask.id.in_(checked_ids))
+        ).scalars() if checked_ids else []
+        task_mask = encode_mask(slots)
         
         journal_point = form.calculate_journal_point()
         learning_point = form.calculate_learning_point()
         
-        # Get or create today's score
-        today_score = DailyScore.query.filter_by(
-            user_id=current_user.id, 
-            date=today
-        ).first()
-        
-        if not today_score:
-            today_score = DailyScore(
-                user_id=current_user.id,
-                date=today
-            )
-            db.session.add(today_score)
-        
-        # Update score data
-        today_score.do_points = do_points
-        today_score.dont_points = dont_points
-        today_score.journal_point = journal_point
-        today_score.learning_point = learning_point
-        today_score.journal_text = form.journal_text.data
-        today_score.learning_text = form.learning_text.data
-        today_score.calculate_total_points()
-        today_score.updated_at = datetime.utcnow()
+        # One INSERT ... ON CONFLICT (user_id, date) DO UPDATE: double submits from
+        # several workers land on the same row instead of racing a SELECT
+        now = datetime.utcnow()
+        stmt = dialect_insert(db.session, DailyScore).values(
+            user_id=current_user.id,
+            date=today,
+            do_points=do_points,
+            dont_points=dont_points,
+            journal_point=journal_point,
+            learning_point=learning_point,
+            total_points=do_points + dont_points + journal_point + learning_point,
+            journal_text=form.journal_text.data,
+            learning_text=form.learning_text.data,
+            task_mask=task_mask,
+            created_at=now,
+            updated_at=now
+        )
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyScore.user_id, DailyScore.date],
+            set_={
+                'do_points': excluded.do_points,
+                'dont_points': excluded.dont_points,
+                'journal_point': excluded.journal_point,
+                'learning_point': excluded.learning_point,
+                'total_points': excluded.do_points + excluded.dont_points + excluded.journal_point + excluded.learning_point,
+                'journal_text': excluded.journal_text,
+                'learning_text': excluded.learning_text,
+                'task_mask': excluded.task_mask,
+                'updated_at': excluded.updated_at
+            }
+        ).returning(DailyScore.id, DailyScore.total_points)
+        score = db.session.execute(stmt).one()
+        refresh_month(current_user.id, today.year, today.month)
+        bump_user_version(current_user.id)  # the upsert is Core, so the flush hook never sees it
         
         db.session.commit()
-        flash('Daily tasks saved successfully!', 'success')
+        flash(f'Daily tasks saved successfully! ({score.total_points}/10 points)', 'success')
         return redirect(url_for('tasks.daily_tasks'))
     
     # If form validation fails, show errors
@@ -108,10 +148,31 @@ def submit_daily_tasks():
     return redirect(url_for('tasks.daily_tasks'))
 
 
+def _month_grid(year, month, scores_dict):
+    """6 weeks (42 days) starting on the Monday of the week containing the 1st"""
+    first_day = date(year, month, 1)
+    start_date = first_day - timedelta(days=first_day.weekday())
+    today = date.today()
+    calendar_data = []
+    for week in range(6):
+        week_data = []
+        for day in range(7):
+            current_date = start_date + timedelta(days=week * 7 + day)
+            week_data.append({
+                'date': current_date,
+                'score': scores_dict.get(current_date),
+                'is_current_month': current_date.month == month,
+                'is_today': current_date == today
+            })
+        calendar_data.append(week_data)
+    return calendar_data
+
+
 @tasks_bp.route('/calendar')
 @login_required
+@conditional(DailyScore)
 def calendar():
-    """Show monthly calendar view"""
+    """Show monthly calendar view, or a quarter/year overview with view=quarter|year"""
     # Get current month/year from query params or use current date
     year = request.args.get('year', type=int) or date.today().year
     month = request.args.get('month', type=int) or date.today().month
@@ -121,6 +182,10 @@ def calendar():
         month = date.today().month
     if year < 2020 or year > 2030:
         year = date.today().year
+
+    view = request.args.get('view', 'month')
+    if view in ('quarter', 'year'):
+        return _calendar_overview(view, year, month)
     
     # Get first day of month and number of days
     first_day = date(year, month, 1)
@@ -137,25 +202,7 @@ def calendar():
     scores_dict = {score.date: score for score in scores}
     
     # Calculate calendar grid
-    calendar_data = []
-    
-    # Get the first Monday of the week containing the first day
-    start_date = first_day - timedelta(days=first_day.weekday())
-    
-    # Generate 6 weeks (42 days) to fill the calendar grid
-    for week in range(6):
-        week_data = []
-        for day in range(7):
-            current_date = start_date + timedelta(days=week * 7 + day)
-            score = scores_dict.get(current_date)
-            
-            week_data.append({
-                'date': current_date,
-                'score': score,
-                'is_current_month': current_date.month == month,
-                'is_today': current_date == date.today()
-            })
-        calendar_data.append(week_data)
+    calendar_data = _month_grid(year, month, scores_dict)
     
     # Calculate navigation dates
     prev_month = month - 1 if month > 1 else 12
@@ -176,6 +223,94 @@ def calendar():
     )
 
 
+def _calendar_overview(view, year, month):
+    """Render 3 or 12 month grids from their rollup rows; day colors come from the year heatmap API"""
+    if view == 'quarter':
+        quarter = request.args.get('quarter', type=int) or (month - 1) // 3 + 1
+        quarter = min(max(quarter, 1), 4)
+        months = list(range(quarter * 3 - 2, quarter * 3 + 1))
+    else:
+        quarter = None
+        months = list(range(1, 13))
+    first_day = date(year, months[0], 1)
+    last_day = date(year, months[-1], monthrange(year, months[-1])[1])
+
+    rollups = months_between(current_user.id, first_day, last_day)
+    month_cards = [{
+        'year': year,
+        'month': m,
+        'name': date(year, m, 1).strftime('%B'),
+        'summary': rollups.get((year, m)),
+        'weeks': _month_grid(year, m, {}),
+    } for m in months]
+
+    if quarter:
+        prev_args = dict(year=year if quarter > 1 else year - 1, quarter=quarter - 1 if quarter > 1 else 4)
+        next_args = dict(year=year if quarter < 4 else year + 1, quarter=quarter + 1 if quarter < 4 else 1)
+        title = f'Q{quarter} {year}'
+    else:
+        prev_args, next_args = dict(year=year - 1), dict(year=year + 1)
+        title = str(year)
+
+    return render_template(
+        'tasks/calendar_overview.html',
+        view=view,
+        title=title,
+        month_cards=month_cards,
+        current_year=year,
+        current_month=month,
+        prev_args=prev_args,
+        next_args=next_args
+    )
+
+
+@tasks_bp.route('/day-details')
+@login_required
+def day_details_range():
+    """Scores for every scored day in ?from=&to= (ISO dates, at most 366 days) as parallel arrays.
+
+    Days without a score are omitted (gray). Texts are not included; ``has_text``
+    flags (1 = journal, 2 = learning) say when /day-details/<y>/<m>/<d> is worth fetching.
+    """
+    try:
+        start = date.fromisoformat(request.args.get('from', ''))
+        end = date.fromisoformat(request.args.get('to', ''))
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    if end < start or (end - start).days > 365:
+        return jsonify({'error': 'Invalid range'}), 400
+
+    rows = db.session.query(
+        DailyScore.date,
+        DailyScore.do_points,
+        DailyScore.dont_points,
+        DailyScore.journal_point,
+        DailyScore.learning_point,
+        DailyScore.total_points,
+        db.case((db.func.length(DailyScore.journal_text) > 0, 1), else_=0)
+        + db.case((db.func.length(DailyScore.learning_text) > 0, 2), else_=0),
+    ).filter(
+        DailyScore.user_id == current_user.id,
+        DailyScore.date >= start,
+        DailyScore.date <= end
+    ).order_by(DailyScore.date).all()
+
+    columns = list(zip(*rows)) or [()] * 7
+    dates, do_points, dont_points, journal_point, learning_point, total_points, has_text = columns
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'dates': [d.isoformat() for d in dates],
+        'do_points': list(do_points),
+        'dont_points': list(dont_points),
+        'journal_point': list(journal_point),
+        'learning_point': list(learning_point),
+        'total_points': list(total_points),
+        'colors': [DailyScore.color_for(p) for p in total_points],
+        'has_text': list(has_text)
+    })
+
+
 @tasks_bp.route('/day-details/<int:year>/<int:month>/<int:day>')
 @login_required
 def day_details(year, month, day):
@@ -215,6 +350,87 @@ def day_details(year, month, day):
         return jsonify({'error': 'Invalid date'}), 400
 
 
+@tasks_bp.route('/api/scores/heatmap')
+@login_required
+def scores_heatmap():
+    """Whole year of total_points as base64 bytes (one per day, 255 = no score) plus days with text.
+
+    ``text`` maps day-of-year index to flags: 1 = journal_text, 2 = learning_text.
+    The ETag covers the year's row count and latest updated_at, so an unchanged
+    year is answered with 304 after one aggregate query.
+    """
+    year = request.args.get('year', type=int) or date.today().year
+    if not 1 <= year <= 9999:
+        return jsonify({'error': 'Invalid year'}), 400
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    in_year = (
+        DailyScore.user_id == current_user.id,
+        DailyScore.date >= first_day,
+        DailyScore.date <= last_day
+    )
+
+    latest, count = db.session.query(db.func.max(DailyScore.updated_at), db.func.count()).filter(*in_year).one()
+    etag = hashlib.sha1(f'{current_user.id}:{year}:{latest}:{count}'.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        rows = db.session.query(
+            DailyScore.date,
+            DailyScore.total_points,
+            db.case((db.func.length(DailyScore.journal_text) > 0, 1), else_=0)
+            + db.case((db.func.length(DailyScore.learning_text) > 0, 2), else_=0),
+        ).filter(*in_year)
+        points = bytearray([SCORE_MISSING]) * 366
+        text = {}
+        for day, total, flags in rows:
+            index = (day - first_day).days
+            points[index] = min(max(total, 0), 254)
+            if flags:
+                text[str(index)] = flags
+        response = jsonify({
+            'year': year,
+            'days': (last_day - first_day).days + 1,
+            'missing': SCORE_MISSING,
+            'points': base64.b64encode(bytes(points)).decode(),
+            'text': text
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@tasks_bp.route('/api/adherence')
+@login_required
+def task_adherence():
+    """Per-task check rate over ?from=&to= (ISO dates, default the last 30 days)"""
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    if end < start:
+        return jsonify({'error': 'Invalid range'}), 400
+    return jsonify(adherence(current_user.id, start, end))
+
+
+@tasks_bp.route('/stats')
+@login_required
+@conditional(DailyScore)
+def stats():
+    """Score trends: rolling means, percentiles, best streak and weekday breakdown"""
+    threshold = request.args.get('threshold', DEFAULT_THRESHOLD, type=int)
+    data = json.loads(stats_json(current_user.id, threshold=threshold))
+    return render_template('tasks/stats.html', stats=data, threshold=threshold)
+
+
+@tasks_bp.route('/api/stats')
+@login_required
+@conditional(DailyScore)
+def stats_api():
+    threshold = request.args.get('threshold', DEFAULT_THRESHOLD, type=int)
+    return current_app.response_class(stats_json(current_user.id, threshold=threshold), mimetype='application/json')
+
+
 @tasks_bp.route('/manage-tasks')
 @login_required
 def manage_tasks():
@@ -246,20 +462,15 @@ def add_task():
     form = UserTaskForm()
     
     if form.validate_on_submit():
-        # Get the next position for this task type
-        max_position = db.session.query(db.func.max(UserTask.position)).filter_by(
-            user_id=current_user.id,
-            task_type=form.task_type.data
-        ).scalar() or 0
-        
+        # Rank after the last task of this type
         task = UserTask(
             user_id=current_user.id,
             task_type=form.task_type.data,
             task_text=form.task_text.data,
-            position=max_position + 1
+            position=last_rank(UserTask, UserTask.user_id == current_user.id, UserTask.task_type == form.task_type.data)
         )
         
-        db.session.add(task)
+        add_with_slot(task)
         db.session.commit()
         flash('Task added successfully!', 'success')
     else:
@@ -289,22 +500,24 @@ def delete_task(task_id):
     return redirect(url_for('tasks.manage_tasks'))
 
 
-@tasks_bp.route('/reorder-tasks', methods=['POST'])
+@tasks_bp.route('/move-task/<int:task_id>', methods=['POST'])
 @login_required
-def reorder_tasks():
-    """Reorder user tasks"""
-    data = request.get_json()
-    task_type = data.get('task_type')
-    task_ids = data.get('task_ids', [])
-    
-    for i, task_id in enumerate(task_ids):
-        task = UserTask.query.filter_by(
-            id=task_id,
-            user_id=current_user.id,
-            task_type=task_type
-        ).first()
-        if task:
-            task.position = i + 1
-    
+def move_task(task_id):
+    """Move one task between its new neighbours: {"before_id": id|null, "after_id": id|null}"""
+    task = UserTask.query.filter_by(id=task_id, user_id=current_user.id).first_or_404()
+    try:
+        before_id, after_id = neighbour_ids(request.get_json(silent=True) or {})
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    try:
+        move_between(
+            task,
+            (UserTask.user_id == current_user.id, UserTask.task_type == task.task_type),
+            before_id,
+            after_id
+        )
+    except RankConflict as exc:
+        db.session.rollback()
+        return jsonify({'error': str(exc)}), 409
     db.session.commit()
-    return jsonify({'success': True})
\ No newline at end of file
+    return jsonify({'success': True, 'position': task.position})
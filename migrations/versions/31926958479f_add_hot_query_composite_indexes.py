@@ -0,0 +1,42 @@
+"""add composite indexes for hot queries
+
+Revision ID: 31926958479f
+Revises: e467842d5b4c
+Create Date: 2026-10-17 18:05:33.470912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '31926958479f'
+down_revision = 'e467842d5b4c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Already covered, so nothing is added for them:
+    # - todo_items (user_id, kind, is_done, position): prefix of ix_todo_items_user_kind_order
+    # - daily_scores (user_id, date): uq_daily_score_once_per_day is backed by an index
+    with op.batch_alter_table('habit_logs', schema=None) as batch_op:
+        # covering for "today's logs" and per-day counts
+        batch_op.create_index('ix_habit_logs_user_date', ['user_id', 'log_date', 'habit_id', 'completed'], unique=False)
+
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_entries_user_date', ['user_id', 'entry_date'], unique=False)
+
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.create_index('ix_reminders_enabled', ['enabled', 'when_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminders_enabled')
+
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_entries_user_date')
+
+    with op.batch_alter_table('habit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_habit_logs_user_date')
@@ -0,0 +1,99 @@
+"""store user_tasks/todo_items positions as rank keys
+
+Revision ID: 5b7e20d94c1a
+Revises: a3f19c07d2e6
+Create Date: 2026-10-17 20:14:52.903615
+
+"""
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e20d94c1a'
+down_revision = 'a3f19c07d2e6'
+branch_labels = None
+depends_on = None
+
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _spread(count):
+    # Frozen copy of app.ranking.spread_ranks
+    width = 1
+    while len(ALPHABET) ** width <= count:
+        width += 1
+    step = len(ALPHABET) ** width // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, len(ALPHABET))
+            digits.append(ALPHABET[digit])
+        ranks.append("".join(reversed(digits)).rstrip(ALPHABET[0]))
+    return ranks
+
+
+def _renumber(table, group_col, order_cols, source, target, to_rank):
+    # Rewrite each (user_id, group) list into ``target`` in its current order
+    conn = op.get_bind()
+    t = sa.table(table, sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column(group_col),
+                 sa.column(source), sa.column(target), *(sa.column(c) for c in order_cols if c != source))
+    rows = conn.execute(
+        sa.select(t.c.id, t.c.user_id, t.c[group_col])
+        .order_by(t.c.user_id, t.c[group_col], *(t.c[c] for c in order_cols), t.c.id)
+    ).all()
+    for _, group in groupby(rows, key=lambda r: (r.user_id, r[2])):
+        ids = [r.id for r in group]
+        values = _spread(len(ids)) if to_rank else range(1, len(ids) + 1)
+        for row_id, value in zip(ids, values):
+            conn.execute(t.update().where(t.c.id == row_id).values({target: value}))
+
+
+def upgrade():
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_todo_items_user_kind_order')
+        batch_op.add_column(sa.Column('position_rank', sa.String(length=32), nullable=True))
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_task_position', type_='unique')
+        batch_op.add_column(sa.Column('position_rank', sa.String(length=32), nullable=True))
+
+    _renumber('todo_items', 'kind', ('position', 'created_at'), 'position', 'position_rank', True)
+    _renumber('user_tasks', 'task_type', ('position',), 'position', 'position_rank', True)
+
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.drop_column('position')
+        batch_op.alter_column('position_rank', new_column_name='position', existing_type=sa.String(length=32), nullable=False)
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.create_index('ix_todo_items_user_kind_order', ['user_id', 'kind', 'is_done', 'position', 'created_at', 'id'], unique=False)
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.drop_column('position')
+        batch_op.alter_column('position_rank', new_column_name='position', existing_type=sa.String(length=32), nullable=False)
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_user_tasks_user_type_position', ['user_id', 'task_type', 'position'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_tasks_user_type_position')
+        batch_op.add_column(sa.Column('position_int', sa.Integer(), nullable=True))
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_todo_items_user_kind_order')
+        batch_op.add_column(sa.Column('position_int', sa.Integer(), nullable=True))
+
+    _renumber('user_tasks', 'task_type', ('position',), 'position', 'position_int', False)
+    _renumber('todo_items', 'kind', ('position', 'created_at'), 'position', 'position_int', False)
+
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.drop_column('position')
+        batch_op.alter_column('position_int', new_column_name='position', existing_type=sa.Integer(), nullable=False)
+    with op.batch_alter_table('user_tasks', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_task_position', ['user_id', 'task_type', 'position'])
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.drop_column('position')
+        batch_op.alter_column('position_int', new_column_name='position', existing_type=sa.Integer(), nullable=False)
+    with op.batch_alter_table('todo_items', schema=None) as batch_op:
+        batch_op.create_index('ix_todo_items_user_kind_order', ['user_id', 'kind', 'is_done', 'position', 'created_at', 'id'], unique=False)
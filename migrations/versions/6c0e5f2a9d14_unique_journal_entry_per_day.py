@@ -0,0 +1,80 @@
+"""one journal entry per user and day
+
+Revision ID: 6c0e5f2a9d14
+Revises: d4a7e2c95b31
+Create Date: 2026-10-18 00:41:27.508316
+
+"""
+import base64
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c0e5f2a9d14'
+down_revision = 'd4a7e2c95b31'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.compression.decompress as of this revision
+def _decompress(raw):
+    if raw is None or not raw.startswith('\x01'):
+        return raw or ''
+    packed = base64.b64decode(raw[2:])
+    if raw[1] == 's':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(packed).decode('utf-8')
+    return zlib.decompress(packed).decode('utf-8')
+
+
+def _merge_duplicates():
+    # Two first saves of the same day could each insert a row. Keep the one
+    # written last and append the others' text to it, oldest first, so nothing
+    # typed is lost; the derived columns are cleared for
+    # `flask journal-fields backfill` and the search index needs
+    # `flask journal-search rebuild` afterwards.
+    bind = op.get_bind()
+    entries = sa.table('journal_entries', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer),
+                       sa.column('entry_date', sa.Date), sa.column('title', sa.String),
+                       sa.column('content', sa.Text), sa.column('updated_at', sa.DateTime),
+                       sa.column('excerpt', sa.String), sa.column('plaintext_len', sa.Integer),
+                       sa.column('word_count', sa.Integer))
+    dupes = (sa.select(entries.c.user_id, entries.c.entry_date)
+             .group_by(entries.c.user_id, entries.c.entry_date).having(sa.func.count() > 1))
+    has_fts = bind.dialect.name == 'sqlite' and sa.inspect(bind).has_table('journal_fts')
+    for user_id, entry_date in bind.execute(dupes).all():
+        rows = bind.execute(
+            sa.select(entries.c.id, entries.c.title, entries.c.content)
+            .where(entries.c.user_id == user_id, entries.c.entry_date == entry_date)
+            .order_by(entries.c.updated_at, entries.c.id)
+        ).all()
+        keep, extra = rows[-1], rows[:-1]
+        content = ''.join(_decompress(row.content) for row in extra) + _decompress(keep.content)
+        title = keep.title or next((row.title for row in reversed(extra) if row.title), None)
+        bind.execute(entries.update().where(entries.c.id == keep.id).values(
+            title=title, content=content, excerpt=None, plaintext_len=None, word_count=None))
+        extra_ids = [row.id for row in extra]
+        bind.execute(entries.delete().where(entries.c.id.in_(extra_ids)))
+        if has_fts:
+            bind.execute(sa.text('DELETE FROM journal_fts WHERE rowid IN :ids')
+                         .bindparams(sa.bindparam('ids', expanding=True)), {'ids': extra_ids})
+
+
+def upgrade():
+    _merge_duplicates()
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_journal_entry_once_per_day', ['user_id', 'entry_date'])
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_journal_entry_once_per_day', type_='unique')
+
+    # ### end Alembic commands ###
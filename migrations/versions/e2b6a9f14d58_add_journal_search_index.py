@@ -0,0 +1,50 @@
+"""add journal full-text search index
+
+Revision ID: e2b6a9f14d58
+Revises: c81d4e6f0a37
+Create Date: 2026-10-17 21:47:36.120954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6a9f14d58'
+down_revision = 'c81d4e6f0a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Not autogenerated: the search tables live outside the ORM metadata (see app/journal_search.py)
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts "
+            "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif dialect == 'postgresql':
+        op.create_table('journal_search_docs',
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entry_date', sa.Date(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('document', postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['entry_id'], ['journal_entries.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('entry_id')
+        )
+        op.create_index('ix_journal_search_docs_document', 'journal_search_docs', ['document'], unique=False, postgresql_using='gin')
+        op.create_index('ix_journal_search_docs_user_date', 'journal_search_docs', ['user_id', 'entry_date'], unique=False)
+    # Populate with: flask --app app journal-search rebuild
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS journal_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_journal_search_docs_user_date', table_name='journal_search_docs')
+        op.drop_index('ix_journal_search_docs_document', table_name='journal_search_docs')
+        op.drop_table('journal_search_docs')
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import User
+
+
+# Set to a scratch PostgreSQL database to run the dialect-parametrized tests there too.
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+def make_app(database_uri):
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    # File-backed so threads and separate connections see the same database.
+    # No app context is left pushed: each request gets its own session, as in production.
+    app = make_app(f"sqlite:///{tmp_path / 'test.db'}")
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def dialect_app(request, tmp_path):
+    """``app`` on each supported dialect; PostgreSQL runs only when TEST_POSTGRES_URL is set."""
+    if request.param == "postgresql":
+        if not POSTGRES_URL:
+            pytest.skip("TEST_POSTGRES_URL is not set")
+        app = make_app(POSTGRES_URL)
+    else:
+        app = make_app(f"sqlite:///{tmp_path / 'test.db'}")
+    yield app
+    with app.app_context():
+        if request.param == "postgresql":
+            db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(email="tester@example.com")
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def login(client, user_id):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+
+
+@pytest.fixture
+def client(app, user_id):
+    """Test client logged in as the ``user_id`` user."""
+    client = app.test_client()
+    login(client, user_id)
+    return client
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+
+from app import analytics
+from app.extensions import db
+from app.models import Habit, HabitLog
+
+# Mon 2024-01-01 .. Sun 2024-01-14, done on both Mondays, Tue 2, Wed 3 and Sun 14
+DONE = (date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 8), date(2024, 1, 14))
+TODAY = date(2024, 1, 14)
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def arithmetic(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics, "np", None)
+    return request.param
+
+
+def test_analyze_matches_hand_computed_rates(arithmetic):
+    habit = Habit(id=1, name="Stretch", start_date=date(2024, 1, 1))
+    data = analytics.analyze(habit, [d.toordinal() for d in DONE], TODAY)
+
+    assert (data["from"], data["to"], data["days"], data["completed"]) == ("2024-01-01", "2024-01-14", 14, 5)
+    assert data["completion_rate"] == round(5 / 14, 4)
+    # last 7 days hold Jan 8 and Jan 14; the 30- and 90-day windows still cover all 14 days
+    assert data["rolling"]["7"]["current"] == round(2 / 7, 4)
+    assert data["rolling"]["30"]["current"] == data["rolling"]["90"]["current"] == round(5 / 14, 4)
+    # day 3 (Jan 3): 3 of 3, day 4 (Jan 4): 3 of 4
+    assert data["rolling"]["7"]["series"][2:4] == [1.0, 0.75]
+    profile = {row["weekday"]: (row["done"], row["days"]) for row in data["weekday_profile"]}
+    assert profile == {"Sun": (1, 2), "Mon": (2, 2), "Tue": (1, 2), "Wed": (1, 2),
+                       "Thu": (0, 2), "Fri": (0, 2), "Sat": (0, 2)}
+    # shorter than 30 days, so best and worst are the whole history
+    assert data["best_period"] == data["worst_period"] == {
+        "start": "2024-01-01", "end": "2024-01-14", "rate": round(5 / 14, 4),
+    }
+
+
+def test_analytics_endpoint_is_scoped_to_the_user(app, client, user_id):
+    with app.app_context():
+        habit = Habit(user_id=user_id, name="Stretch", start_date=date(2024, 1, 1))
+        db.session.add(habit)
+        db.session.flush()
+        db.session.add_all(HabitLog(user_id=user_id, habit_id=habit.id, log_date=d) for d in DONE)
+        db.session.commit()
+        habit_id = habit.id
+
+    data = client.get(f"/api/habits/{habit_id}/analytics").get_json()
+    assert (data["habit_id"], data["completed"]) == (habit_id, 5)
+    assert client.get(f"/api/habits/{habit_id + 1}/analytics").status_code == 404
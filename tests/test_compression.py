@@ -0,0 +1,52 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from app import compression
+from app.extensions import db
+from app.models import JournalEntry
+
+HTML = "<p>" + "Dear diary, today was much like yesterday. " * 40 + "</p>"
+
+
+def _stored(entry_id):
+    return db.session.execute(text("SELECT content FROM journal_entries WHERE id = :id"), {"id": entry_id}).scalar()
+
+
+def test_codec_round_trip():
+    for codec in compression.available_codecs():
+        stored = compression.compress(HTML, codec)
+        assert isinstance(stored, str)
+        assert compression.codec_of(stored) == codec
+        assert compression.decompress(stored) == HTML
+    assert compression.compress("<p>short</p>", "zlib") == "<p>short</p>"
+
+
+def test_column_stays_plain_text_when_off_and_rolls_back(app, user_id, monkeypatch):
+    monkeypatch.setattr(compression, "_write_codec", "none")
+    with app.app_context():
+        entry = JournalEntry(user_id=user_id, entry_date=date(2024, 1, 1), content=HTML)
+        db.session.add(entry)
+        db.session.commit()
+        assert _stored(entry.id) == HTML
+
+        totals = compression.recompress_content("zlib")
+        assert totals["rewritten"] == 1 and totals["bytes_after"] < totals["bytes_before"]
+        assert _stored(entry.id).startswith("\x01z")
+        db.session.expire_all()
+        assert db.session.get(JournalEntry, entry.id).content == HTML
+
+        # Rollback: rewrite as plain text, after which CONTENT_COMPRESSION can be dropped
+        compression.recompress_content("none")
+        assert _stored(entry.id) == HTML
+
+
+def test_writes_use_the_configured_codec(app, user_id, monkeypatch):
+    monkeypatch.setattr(compression, "_write_codec", "zlib")
+    with app.app_context():
+        entry = JournalEntry(user_id=user_id, entry_date=date(2024, 1, 2), content=HTML)
+        db.session.add(entry)
+        db.session.commit()
+        assert compression.codec_of(_stored(entry.id)) == "zlib"
+        # derived columns are computed from the text, not the stored form
+        assert entry.word_count == 7 * 40
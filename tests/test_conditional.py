@@ -0,0 +1,62 @@
+import pytest
+
+from app.extensions import db
+from app.models import Habit, TodoItem, User
+
+ENDPOINTS = [
+    "/habits/",
+    "/tasks/stats",
+    "/tasks/api/stats",
+    "/api/todos",
+    "/api/habits/analytics",
+    "/api/journal/stats",
+    "/api/journal/on-this-day",
+    "/api/journal/heatmap",
+]
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200, url
+    return client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_unchanged_views_answer_304(client, url):
+    assert _revalidate(client, url).status_code == 304
+
+
+def test_habit_views_answer_304(app, client, user_id):
+    with app.app_context():
+        habit = Habit(user_id=user_id, name="Read")
+        db.session.add(habit)
+        db.session.commit()
+        habit_id = habit.id
+    for url in (f"/api/habits/{habit_id}/analytics", f"/api/habits/{habit_id}/history"):
+        assert _revalidate(client, url).status_code == 304
+
+
+def test_profile_change_invalidates(app, client, user_id):
+    etag = client.get("/habits/").headers["ETag"]
+    with app.app_context():
+        db.session.get(User, user_id).username = "renamed"
+        db.session.commit()
+    response = client.get("/habits/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "renamed" in response.get_data(as_text=True)
+
+
+def test_edit_that_keeps_counts_and_timestamps_invalidates(app, client, user_id):
+    # TodoItem has no updated_at: toggling one changes neither its count nor created_at
+    with app.app_context():
+        item = TodoItem(user_id=user_id, label="milk", kind="todo", position="i")
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+    etag = client.get("/api/todos").headers["ETag"]
+    with app.app_context():
+        db.session.get(TodoItem, item_id).is_done = True
+        db.session.commit()
+    response = client.get("/api/todos", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["items"][0]["is_done"] is True
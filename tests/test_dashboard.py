@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User
+
+
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_dashboard_statement_budget(app, client):
+    # Cache miss: load_user plus the one snapshot query
+    with count_statements(app) as statements:
+        assert client.get("/dashboard/").status_code == 200
+    assert len(statements) == 2, statements
+
+    # Fragment-cache hit: only load_user
+    with count_statements(app) as statements:
+        assert client.get("/dashboard/").status_code == 200
+    assert len(statements) == 1, statements
+
+
+def _data_version(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).data_version
+
+
+def test_daily_submit_invalidates_cached_panels(app, client, user_id):
+    before = _data_version(app, user_id)
+    assert client.post("/tasks/submit", data={"journal_text": "x", "learning_text": ""}).status_code == 302
+    assert _data_version(app, user_id) > before
+
+
+def test_cache_counters_need_the_status_token(app, client):
+    assert "fragment_cache" not in client.get("/status").get_json()
+    assert client.get("/status/caches").status_code == 404
+
+    app.config["STATUS_TOKEN"] = "s3cret"
+    assert client.get("/status/caches", headers={"Authorization": "Bearer wrong"}).status_code == 404
+    response = client.get("/status/caches", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "hits" in response.get_json()["fragment_cache"]
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import bitsets
+from app.extensions import db
+from app.models import Habit, HabitLog, HabitStats
+
+
+@pytest.fixture
+def habit_id(app, user_id):
+    with app.app_context():
+        habit = Habit(user_id=user_id, name="Read", created_at=datetime(2023, 6, 1))
+        db.session.add(habit)
+        db.session.flush()
+        # a run across New Year, then a gap and a single day
+        for day in (date(2023, 12, 30), date(2023, 12, 31), date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 5)):
+            db.session.add(HabitLog(user_id=user_id, habit_id=habit.id, log_date=day))
+        db.session.commit()
+        return habit.id
+
+
+@pytest.mark.parametrize("year", [-1, 10000, 99999])
+def test_history_rejects_out_of_range_years(client, habit_id, year):
+    response = client.get(f"/api/habits/{habit_id}/history?year={year}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid year"}
+
+
+@pytest.mark.parametrize("use_bitsets", [False, True])
+def test_history_streak_spans_new_year(app, habit_id, use_bitsets):
+    app.config["HABIT_BITSETS"] = use_bitsets
+    with app.app_context():
+        if use_bitsets:
+            bitsets.rebuild_year_bits()
+        habit = db.session.get(Habit, habit_id)
+        data = bitsets.habit_history(habit, 2024, today=date(2024, 1, 2))
+        assert (data["current_streak"], data["longest_streak"], data["completed"]) == (4, 2, 3)
+        assert bitsets.history_bits(habit_id, date(2023, 12, 30), date(2024, 1, 5)) == 0b1001111
+        assert bitsets.years_bits(habit_id, 2023, 2025)[2025] == 0
+
+
+def _logged_days(app, habit_id):
+    with app.app_context():
+        return sorted(
+            (day.isoformat(), completed)
+            for day, completed in db.session.execute(
+                db.select(HabitLog.log_date, HabitLog.completed).where(HabitLog.habit_id == habit_id)
+            )
+        )
+
+
+def test_bulk_logs_count_applied_and_skipped(app, client, habit_id):
+    entries = [
+        {"habit_id": habit_id, "date": "2024-02-01"},
+        {"habit_id": habit_id, "date": "2024-02-02", "completed": True},
+        {"habit_id": habit_id, "date": "2024-01-01"},  # already logged: no-op
+        {"habit_id": habit_id + 1000, "date": "2024-02-03"},  # not this user's habit
+        {"habit_id": habit_id, "date": "not a date"},
+        {"date": "2024-02-04"},
+    ]
+    response = client.post("/api/habits/logs/bulk", json={"entries": entries})
+    assert response.get_json() == {"applied": 2, "skipped": 4}
+
+    # uncheck one day, and the same payload again changes nothing
+    response = client.post("/api/habits/logs/bulk", json={"entries": [
+        {"habit_id": habit_id, "date": "2024-02-02", "completed": False},
+    ]})
+    assert response.get_json() == {"applied": 1, "skipped": 0}
+    assert client.post("/api/habits/logs/bulk", json={"entries": entries}).get_json() == {"applied": 1, "skipped": 5}
+
+    days = _logged_days(app, habit_id)
+    assert ("2024-02-01", True) in days and ("2024-02-02", True) in days
+    with app.app_context():
+        assert db.session.get(HabitStats, habit_id).total_completions == 7
+
+
+def test_bulk_logs_reject_bad_payloads(client):
+    assert client.post("/api/habits/logs/bulk", json={"entries": "nope"}).status_code == 400
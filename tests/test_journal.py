@@ -0,0 +1,252 @@
+import json
+import re
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, text, update
+from sqlalchemy.orm import Session
+
+from app import journal_search, journal_stats, models
+from app.journal_fields import backfill_derived_fields
+from app.deltas import text_hash
+from app.extensions import db
+from app.models import JournalEntry, User
+
+
+def _other_user(app):
+    with app.app_context():
+        other = User(email="other@example.com")
+        other.set_password("secret")
+        db.session.add(other)
+        db.session.commit()
+        return other.id
+
+
+def _entries(app, user_id, *rows):
+    """Add ``(date, title, html)`` entries for ``user_id``; returns their ids."""
+    with app.app_context():
+        entries = [JournalEntry(user_id=user_id, entry_date=d, title=title, content=html) for d, title, html in rows]
+        db.session.add_all(entries)
+        db.session.commit()
+        return [e.id for e in entries]
+
+
+@pytest.fixture
+def search_index(app, monkeypatch):
+    # Engines are recreated per test and may reuse an id(), so start from an empty "has index" memo
+    monkeypatch.setattr(journal_search, "_index_present", set())
+    with app.app_context():
+        journal_search.rebuild_search_index()
+
+
+def test_search_is_scoped_to_the_user(app, client, user_id, search_index):
+    mine, = _entries(app, user_id, (date(2024, 5, 1), "Hike", "<p>Walked up the <b>mountain</b> trail</p>"))
+    _entries(app, _other_user(app), (date(2024, 5, 2), "Mine too", "<p>The mountain was cold</p>"))
+
+    results = client.get("/api/journal/search?q=mount").get_json()["results"]
+    assert [r["id"] for r in results] == [mine]
+    assert "<mark>mountain</mark>" in results[0]["snippet"]
+    assert client.get("/api/journal/search?q=mountain&to=2024-04-30").get_json()["results"] == []
+    assert client.get("/api/journal/search?q=mountain&from=bad").status_code == 400
+
+
+def test_journal_list_pages_by_keyset(app, client, user_id, monkeypatch):
+    from app.journal import routes
+
+    monkeypatch.setattr(routes, "PER_PAGE", 2)
+    days = [date(2024, 1, n) for n in (3, 9, 1, 7, 5)]
+    _entries(app, user_id, *((d, f"entry {d.day}", f"<p>day {d.day}</p>") for d in days))
+
+    seen, url = [], "/journal/"
+    while url:
+        html = client.get(url).get_data(as_text=True)
+        seen.append(re.findall(r"entry (\d+)", html))
+        match = re.search(r'href="(/journal/\?cursor=[^"]+)"', html)
+        url = match and match.group(1).replace("&amp;", "&")
+    assert seen == [["9", "7"], ["5", "3"], ["1"]]
+    assert client.get("/journal/?cursor=garbage").status_code == 400
+
+
+def test_heatmap_cache_is_invalidated_by_journal_writes(app, client, user_id):
+    from app.journal_stats import journal_cache
+
+    today = date.today()
+    _entries(app, user_id, (today, "today", "<p>x</p>"))
+    assert client.get("/api/journal/heatmap").get_json() == [{"date": today.isoformat(), "count": 1}]
+    hits = journal_cache.hits
+    assert client.get("/api/journal/heatmap").get_json() == [{"date": today.isoformat(), "count": 1}]
+    assert journal_cache.hits == hits + 1
+
+    yesterday = today - timedelta(days=1)
+    _entries(app, user_id, (yesterday, "yesterday", "<p>y</p>"))
+    assert client.get("/api/journal/heatmap").get_json() == [
+        {"date": yesterday.isoformat(), "count": 1}, {"date": today.isoformat(), "count": 1},
+    ]
+
+
+def _diff(a, b):
+    """The single-span delta the editor sends, for strings without surrogate pairs."""
+    start = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    end = 0
+    while end < min(len(a), len(b)) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    return [{"retain": start}, {"delete": len(a) - start - end}, {"insert": b[start:len(b) - end]}]
+
+
+STORED = "<p>Rain <em>all</em> day</p>"
+NORMALIZED = "<p>Rain <em>all</em> day</p><p><br></p>"  # what an editor might show for it
+
+
+def _autosave(client, version, base, html, **extra):
+    return client.post("/journal/day/2024-05-01/autosave",
+                       json={"version": version, "base_hash": text_hash(base), "ops": _diff(base, html), **extra})
+
+
+def _stored(app, user_id):
+    with app.app_context():
+        entry = JournalEntry.query.filter_by(user_id=user_id, entry_date=date(2024, 5, 1)).one()
+        return entry.version, entry.content
+
+
+def test_text_hash_is_fnv1a_over_utf16_units():
+    # the same values the editor's textHash() gives
+    assert [text_hash(s) for s in ("", "a", "\U0001F600")] == ["811c9dc5", "e40c292c", "cb31c4b8"]
+
+
+def test_autosave_applies_a_delta_made_against_the_stored_text(app, client, user_id):
+    _entries(app, user_id, (date(2024, 5, 1), "Rain", STORED))
+    html = "<p>Rain <em>all</em> afternoon</p>"
+    res = _autosave(client, 1, STORED, html)
+    assert res.status_code == 200
+    assert _stored(app, user_id) == (res.get_json()["version"], html)
+
+
+def test_autosave_refuses_a_delta_made_against_other_text(app, client, user_id):
+    _entries(app, user_id, (date(2024, 5, 1), "Rain", STORED))
+    # diffed against the editor's normalized copy: at the stored text's offsets it would garble it
+    res = _autosave(client, 1, NORMALIZED, NORMALIZED.replace("day", "afternoon"))
+    assert res.status_code == 409
+    assert res.get_json()["content"] == STORED
+    assert _stored(app, user_id) == (1, STORED)
+
+    missing = client.post("/journal/day/2024-05-01/autosave", json={"version": 1, "ops": []})
+    assert missing.status_code == 400
+
+
+def test_autosave_rebases_onto_the_copy_returned_with_a_conflict(app, client, user_id):
+    _entries(app, user_id, (date(2024, 5, 1), "Rain", STORED))
+    assert _autosave(client, 1, STORED, "<p>Rain all day</p>").status_code == 200  # saved elsewhere
+
+    mine = "<p>Rain <em>all</em> day, then sun</p>"
+    conflict = _autosave(client, 1, STORED, mine).get_json()
+    res = _autosave(client, conflict["version"], conflict["content"], mine)
+    assert res.status_code == 200
+    assert _stored(app, user_id) == (res.get_json()["version"], mine)
+
+
+@pytest.fixture
+def save_elsewhere(app):
+    """Queue SQL to commit on its own connection just before the request's next flush, as a concurrent save."""
+    pending = []
+
+    def before_flush(session, context, instances):
+        while pending:
+            with db.engine.begin() as connection:
+                connection.execute(text(pending.pop(0)))
+
+    event.listen(Session, "before_flush", before_flush)
+    yield pending.append
+    event.remove(Session, "before_flush", before_flush)
+
+
+def _insert_sql(user_id):
+    return ("INSERT INTO journal_entries (user_id, entry_date, title, content, entry_month, entry_day,"
+            f" created_at, updated_at) VALUES ({user_id}, '2024-05-01', 'Theirs', '<p>theirs</p>', 5, 1,"
+            " '2024-05-01 09:00:00', '2024-05-01 09:00:00')")
+
+
+@pytest.mark.parametrize("existing", [False, True])
+def test_journal_form_save_that_loses_a_race_is_flashed(app, client, user_id, save_elsewhere, existing):
+    if existing:
+        _entries(app, user_id, (date(2024, 5, 1), "Rain", STORED))
+        save_elsewhere("UPDATE journal_entries SET version = version + 1, content = '<p>theirs</p>'")
+    else:
+        save_elsewhere(_insert_sql(user_id))
+
+    res = client.post("/journal/day/2024-05-01", data={"title": "Mine", "content": "<p>mine</p>"},
+                      follow_redirects=True)
+    assert res.status_code == 200
+    assert "changed elsewhere" in res.get_data(as_text=True)
+    assert _stored(app, user_id)[1] == "<p>theirs</p>"
+
+
+def test_autosave_of_a_first_entry_that_loses_a_race_conflicts(app, client, user_id, save_elsewhere):
+    save_elsewhere(_insert_sql(user_id))
+    res = _autosave(client, 0, "", "<p>mine</p>")
+    assert res.status_code == 409
+    assert res.get_json()["content"] == "<p>theirs</p>"
+    with app.app_context():
+        assert JournalEntry.query.filter_by(user_id=user_id).count() == 1
+
+
+def test_writing_stats_sum_words_and_characters_per_month(app, client, user_id):
+    _, _, march, _ = _entries(
+        app, user_id,
+        (date(2023, 1, 5), "", "<p>one two three</p>"),  # 3 words, 13 characters
+        (date(2023, 1, 20), "", "<p>It&#39;s a <b>well-known</b> fact</p><p>Second line</p>"),  # 6, 34
+        (date(2023, 3, 3), "", "<p>café au lait</p>"),  # 3, 12
+        (date(2024, 1, 1), "", "<p>next year</p>"),
+    )
+    _entries(app, _other_user(app), (date(2023, 1, 5), "", "<p>not mine</p>"))
+    with app.app_context():
+        # as for a row written before the column existed
+        db.session.execute(update(JournalEntry).where(JournalEntry.id == march).values(word_count=None))
+        db.session.commit()
+
+    stats = client.get("/api/journal/stats?year=2023").get_json()
+    assert (stats["year"], stats["entries"], stats["words"], stats["chars"], stats["uncounted"]) == (2023, 3, 9, 59, 1)
+    assert stats["months"][:3] == [
+        {"month": 1, "entries": 2, "words": 9, "chars": 47},
+        {"month": 2, "entries": 0, "words": 0, "chars": 0},
+        {"month": 3, "entries": 1, "words": 0, "chars": 12},
+    ]
+    assert len(stats["months"]) == 12
+
+    with app.app_context():
+        assert backfill_derived_fields() == 1
+    stats = client.get("/api/journal/stats?year=2023").get_json()
+    assert (stats["words"], stats["uncounted"], stats["months"][2]["words"]) == (12, 0, 3)
+    assert client.get("/api/journal/stats?year=0").status_code == 200  # 0 means this year
+    assert client.get("/api/journal/stats?year=10000").status_code == 400
+
+
+def test_on_this_day_follows_the_users_local_date(app, client, user_id, monkeypatch):
+    instant = datetime(2024, 3, 1, 10, 30, tzinfo=timezone.utc)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return instant.astimezone(tz)
+
+    monkeypatch.setattr(models, "datetime", FrozenDatetime)
+    _entries(app, user_id, *((d, d.isoformat(), "<p>x</p>") for d in (
+        date(2024, 3, 1), date(2023, 3, 2), date(2022, 3, 1), date(2021, 2, 28), date(2020, 2, 29))))
+    _entries(app, _other_user(app), (date(2023, 3, 1), "not mine", "<p>x</p>"))
+
+    def on_this_day(timezone_name):
+        with app.app_context():
+            db.session.get(User, user_id).timezone = timezone_name
+            db.session.commit()
+        data = client.get("/api/journal/on-this-day").get_json()
+        return data["date"], [(e["date"], e["years_ago"]) for e in data["entries"]]
+
+    assert on_this_day(None) == ("2024-03-01", [("2022-03-01", 2)])
+    assert on_this_day("Pacific/Kiritimati") == ("2024-03-02", [("2023-03-02", 1)])  # UTC+14
+    assert on_this_day("Pacific/Pago_Pago") == ("2024-02-29", [("2020-02-29", 4)])  # UTC-11
+
+    # 28 February picks up 29 February entries only when this year has none
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        dates = {today: [e["date"] for e in json.loads(journal_stats.on_this_day_json(user, today=today))["entries"]]
+                 for today in (date(2023, 2, 28), date(2024, 2, 28))}
+    assert dates == {date(2023, 2, 28): ["2021-02-28", "2020-02-29"], date(2024, 2, 28): ["2021-02-28"]}
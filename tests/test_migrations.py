@@ -0,0 +1,92 @@
+import base64
+import os
+import zlib
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.streaks import rebuild_habit_stats
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+DAY = date(2024, 2, 20)
+
+
+@pytest.fixture
+def unmigrated_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+
+
+def _run(sql, **params):
+    db.session.execute(text(sql), params)
+
+
+def test_habit_stats_are_backfilled_on_upgrade(unmigrated_app):
+    upgrade(directory=MIGRATIONS, revision="811674234097")
+    _run("INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'a@example.com', 'x', :now)",
+         now=DAY)
+    for habit_id in (1, 2, 3):
+        _run("INSERT INTO habits (id, user_id, name, frequency, created_at) VALUES (:id, 1, 'h', 'daily', :now)",
+             id=habit_id, now=DAY)
+    # habit 1: runs of 3 and 2 days with an unchecked day between; habit 2: one day; habit 3: no logs
+    logs = [(1, 0, True), (1, 1, True), (1, 2, True), (1, 3, False), (1, 4, True), (1, 5, True), (2, 7, True)]
+    for habit_id, offset, completed in logs:
+        _run("INSERT INTO habit_logs (user_id, habit_id, log_date, completed, created_at)"
+             " VALUES (1, :habit, :day, :completed, :now)",
+             habit=habit_id, day=DAY + timedelta(days=offset), completed=completed, now=DAY)
+    db.session.commit()
+
+    upgrade(directory=MIGRATIONS, revision="7b8355305158")
+    rows = db.session.execute(text(
+        "SELECT habit_id, current_streak, longest_streak, total_completions, last_completed_date"
+        " FROM habit_stats ORDER BY habit_id"
+    )).all()
+    assert [tuple(r) for r in rows] == [(1, 2, 3, 5, "2024-02-25"), (2, 1, 1, 1, "2024-02-27")]
+
+    db.session.commit()
+    upgrade(directory=MIGRATIONS)
+    assert rebuild_habit_stats(check_only=True) == (3, 0)
+
+
+def test_score_months_are_backfilled_on_upgrade(unmigrated_app):
+    upgrade(directory=MIGRATIONS, revision="31926958479f")
+    _run("INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'a@example.com', 'x', :now)",
+         now=DAY)
+    for day, points in ((date(2024, 1, 30), 8), (date(2024, 1, 31), 5), (date(2024, 2, 1), 2)):
+        _run("INSERT INTO daily_scores (user_id, date, do_points, dont_points, journal_point, learning_point,"
+             " total_points, created_at, updated_at) VALUES (1, :day, 0, 0, 0, 0, :points, :now, :now)",
+             day=day, points=points, now=DAY)
+    db.session.commit()
+
+    upgrade(directory=MIGRATIONS, revision="a3f19c07d2e6")
+    rows = db.session.execute(text(
+        "SELECT year, month, days_scored, total_points, best_points, green_days, yellow_days, red_days"
+        " FROM daily_score_months WHERE user_id = 1 ORDER BY year, month"
+    )).all()
+    assert [tuple(r) for r in rows] == [(2024, 1, 2, 13, 8, 1, 1, 0), (2024, 2, 1, 2, 2, 0, 0, 1)]
+
+
+def test_duplicate_journal_days_are_merged_on_upgrade(unmigrated_app):
+    upgrade(directory=MIGRATIONS, revision="d4a7e2c95b31")
+    _run("INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'a@example.com', 'x', :now)",
+         now=DAY)
+    packed = "\x01z" + base64.b64encode(zlib.compress(b"<p>first</p>")).decode("ascii")
+    for entry_id, title, content, hour in ((1, "Morning", packed, 9), (2, "", "<p>second</p>", 10)):
+        _run("INSERT INTO journal_entries (id, user_id, entry_date, title, content, word_count, entry_month,"
+             " entry_day, created_at, updated_at) VALUES (:id, 1, :day, :title, :content, 1, 2, 20, :at, :at)",
+             id=entry_id, day=DAY, title=title, content=content, at=datetime.combine(DAY, time(hour)))
+    db.session.commit()
+
+    upgrade(directory=MIGRATIONS, revision="6c0e5f2a9d14")
+    rows = db.session.execute(text("SELECT id, title, content, word_count FROM journal_entries")).all()
+    assert [tuple(r) for r in rows] == [(2, "Morning", "<p>first</p><p>second</p>", None)]
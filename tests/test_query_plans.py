@@ -0,0 +1,30 @@
+import os
+
+import pytest
+from flask_migrate import upgrade
+
+from app import create_app
+from app.config import Config
+from app.query_plans import check_plans
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+
+
+@pytest.fixture
+def migrated_app(tmp_path):
+    # Built from the migrations rather than create_all, so the indexes checked are the shipped ones
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'migrated.db'}"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        yield app
+
+
+def test_hot_queries_avoid_full_scans(migrated_app):
+    results = check_plans()
+    assert results
+    scans = {result.name: result.full_scans for result in results if result.full_scans}
+    assert not scans, scans
@@ -0,0 +1,93 @@
+import pytest
+
+from app.extensions import db, scheduler
+from app.jobs import run_in_app_context
+from app.models import TodoItem, User, UserTask
+from app.ranking import MAX_RANK_LENGTH, rebalance_long_ranks
+
+
+def _todos(app, user_id, count):
+    with app.app_context():
+        items = [TodoItem(user_id=user_id, label=f"todo {i}", kind="todo", position=rank)
+                 for i, rank in enumerate(["a", "b", "c"][:count])]
+        db.session.add_all(items)
+        db.session.commit()
+        return [item.id for item in items]
+
+
+def test_move_todo_between_neighbours(app, client, user_id):
+    a, b, c = _todos(app, user_id, 3)
+    response = client.post(f"/api/todos/{c}/move", json={"before_id": a, "after_id": b})
+    assert response.status_code == 200
+    assert "a" < response.json["position"] < "b"
+
+
+def test_move_todo_with_reversed_neighbours_is_a_conflict(app, client, user_id):
+    a, b, c = _todos(app, user_id, 3)
+    response = client.post(f"/api/todos/{c}/move", json={"before_id": b, "after_id": a})
+    assert response.status_code == 409
+    with app.app_context():
+        assert [t.position for t in TodoItem.query.order_by(TodoItem.id)] == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("payload", [{"before_id": [1, 2]}, {"after_id": "1"}, {"before_id": True}])
+def test_move_todo_rejects_non_integer_ids(app, client, user_id, payload):
+    a, = _todos(app, user_id, 1)
+    assert client.post(f"/api/todos/{a}/move", json=payload).status_code == 400
+
+
+def test_move_task_with_reversed_neighbours_is_a_conflict(app, client, user_id):
+    with app.app_context():
+        tasks = [UserTask(user_id=user_id, task_type="do", task_text=f"task {i}", position=rank, slot=i)
+                 for i, rank in enumerate("abc")]
+        db.session.add_all(tasks)
+        db.session.commit()
+        a, b, c = (t.id for t in tasks)
+    assert client.post(f"/tasks/move-task/{c}", json={"before_id": b, "after_id": a}).status_code == 409
+    assert client.post(f"/tasks/move-task/{c}", json={"before_id": {"id": a}}).status_code == 400
+    assert client.post(f"/tasks/move-task/{c}", json={"before_id": a, "after_id": b}).status_code == 200
+
+
+def test_rank_rebalance_job_runs_outside_a_request(app, user_id):
+    with app.app_context():
+        db.session.add(TodoItem(user_id=user_id, label="deep", kind="todo", position="i" * 20))
+        db.session.commit()
+    job = scheduler.get_job("rank_rebalance")
+    assert job.func.func is run_in_app_context
+    # As the scheduler thread calls it: no app context pushed
+    assert run_in_app_context(app, rebalance_long_ranks) == 1
+    with app.app_context():
+        assert len(TodoItem.query.one().position) <= MAX_RANK_LENGTH
+
+
+def test_move_todo_next_to_a_missing_or_foreign_row_is_a_conflict(app, client, user_id):
+    a, b = _todos(app, user_id, 2)
+    with app.app_context():
+        other = User(email="other@example.com")
+        other.set_password("secret")
+        db.session.add(other)
+        db.session.flush()
+        foreign = TodoItem(user_id=other.id, label="theirs", kind="todo", position="0")
+        db.session.add(foreign)
+        db.session.commit()
+        foreign_id = foreign.id
+    for payload in ({"before_id": foreign_id}, {"after_id": 999999}, {"before_id": a, "after_id": foreign_id}):
+        assert client.post(f"/api/todos/{b}/move", json=payload).status_code == 409
+    with app.app_context():
+        assert db.session.get(TodoItem, b).position == "b"
+
+
+def test_move_that_would_outgrow_keys_respaces_the_list(app, client, user_id):
+    with app.app_context():
+        items = [TodoItem(user_id=user_id, label=f"todo {i}", kind="todo", position=rank)
+                 for i, rank in enumerate(["a", "a00000000001", "b"])]
+        db.session.add_all(items)
+        db.session.commit()
+        a, tight, c = (item.id for item in items)
+    response = client.post(f"/api/todos/{c}/move", json={"before_id": a, "after_id": tight})
+    assert response.status_code == 200
+    with app.app_context():
+        rows = TodoItem.query.order_by(TodoItem.position).all()
+        assert [row.id for row in rows] == [a, c, tight]
+        assert max(len(row.position) for row in rows) <= MAX_RANK_LENGTH
+        assert response.json["position"] == db.session.get(TodoItem, c).position
@@ -0,0 +1,53 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app import jobs
+from app.extensions import db
+from app.models import Habit, HabitLog, Reminder
+from app.scheduling import due_habits, sunday_weekday
+
+SUNDAY = date(2024, 3, 3)
+
+
+def test_sunday_weekday():
+    assert [sunday_weekday(SUNDAY + timedelta(days=n)) for n in range(7)] == [0, 1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize("weekdays, sent", [("0", True), ("6", False), ("1,2", False)])
+def test_reminder_weekdays_count_from_sunday(app, user_id, monkeypatch, weekdays, sent):
+    # "0" means Sunday, as the reminder form labels it; before, it was compared with date.weekday() (0=Mon)
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return SUNDAY
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.combine(SUNDAY, time(8, 0))
+
+    outbox = []
+    monkeypatch.setattr(jobs, "date", FrozenDate)
+    monkeypatch.setattr(jobs, "datetime", FrozenDatetime)
+    monkeypatch.setattr(jobs, "send_email", lambda to, subject, body: outbox.append(body))
+    with app.app_context():
+        db.session.add(Reminder(user_id=user_id, when_time=time(8, 0), weekdays=weekdays))
+        db.session.commit()
+        jobs.check_and_send_reminders()
+    assert outbox == (["Habit reminder"] if sent else [])
+
+
+def test_weekly_habit_is_due_until_done_that_week(app, user_id):
+    with app.app_context():
+        habit = Habit(user_id=user_id, name="Long run", frequency="weekly", created_at=datetime(2024, 1, 1))
+        db.session.add(habit)
+        db.session.commit()
+        week = [SUNDAY + timedelta(days=n) for n in range(7)]
+        assert all(due_habits(user_id, day) == [habit] for day in week)
+
+        tuesday = week[2]
+        db.session.add(HabitLog(user_id=user_id, habit_id=habit.id, log_date=tuesday))
+        db.session.commit()
+        assert [bool(due_habits(user_id, day)) for day in week] == [True, True, True, False, False, False, False]
+        assert due_habits(user_id, SUNDAY + timedelta(days=7)) == [habit]
@@ -0,0 +1,53 @@
+import random
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models import Habit, HabitLog, User
+from app.streaks import compute_streaks, streaks_for_user
+
+
+TODAY = date(2024, 3, 1)  # the day after a leap day, so runs cross Feb 29
+
+
+def reference_streaks(days, today):
+    """(current, longest, total) by walking the calendar one day at a time."""
+    longest = run = 0
+    day = min(days, default=today)
+    while day <= today:
+        run = run + 1 if day in days else 0
+        longest = max(longest, run)
+        day += timedelta(days=1)
+    return run, longest, len(days)
+
+
+def test_streaks_match_day_by_day_reference(dialect_app):
+    rng = random.Random(20240301)
+    with dialect_app.app_context():
+        user = User(email="streaks@example.com")
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.flush()
+        expected = {}
+        for n in range(12):
+            habit = Habit(user_id=user.id, name=f"habit {n}")
+            db.session.add(habit)
+            db.session.flush()
+            density = rng.choice([0.2, 0.5, 0.8, 1.0])
+            completed = set()
+            for offset in range(120):
+                day = TODAY - timedelta(days=offset)
+                if n % 4 == 0 and offset == 0:
+                    continue  # nothing logged today: current streak is 0
+                if rng.random() < density:
+                    completed.add(day)
+                    db.session.add(HabitLog(user_id=user.id, habit_id=habit.id, log_date=day))
+                elif rng.random() < 0.3:
+                    # unchecked days are stored too and must break a run
+                    db.session.add(HabitLog(user_id=user.id, habit_id=habit.id, log_date=day, completed=False))
+            if completed:
+                expected[habit.id] = reference_streaks(completed, TODAY)
+        db.session.commit()
+
+        rows = {r.habit_id: (r.current, r.longest, r.total) for r in compute_streaks(user.id, today=TODAY)}
+        assert rows == expected
+        assert streaks_for_user(user.id, today=TODAY) == {k: v[:2] for k, v in expected.items()}
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from app.extensions import db
+from app.models import DailyScore, DailyScoreMonth, UserTask
+from conftest import login
+
+
+@pytest.mark.parametrize("year", ["99999", "-5", "10000"])
+def test_scores_heatmap_rejects_out_of_range_year(client, year):
+    response = client.get(f"/tasks/api/scores/heatmap?year={year}")
+    assert response.status_code == 400
+    assert response.json == {"error": "Invalid year"}
+
+
+def test_scores_heatmap_year(client):
+    response = client.get("/tasks/api/scores/heatmap?year=2024")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+
+def test_year_overview_colors_days_from_the_heatmap(client):
+    html = client.get("/tasks/calendar?view=year&year=2024").get_data(as_text=True)
+    assert "/tasks/api/scores/heatmap?year=2024" in html
+    assert html.count('class="text-center text-muted mini-day') == 366
+
+
+def test_parallel_submits_leave_one_score_row(app, user_id):
+    def submit(i):
+        client = app.test_client()
+        login(client, user_id)
+        return client.post("/tasks/submit", data={"journal_text": f"entry {i}", "learning_text": ""}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(submit, range(16)))
+
+    assert statuses == [302] * 16
+    today = date.today()
+    with app.app_context():
+        assert db.session.query(DailyScore).filter_by(user_id=user_id).count() == 1
+        month = db.session.get(DailyScoreMonth, (user_id, today.year, today.month))
+        assert month.days_scored == 1
+
+
+def test_add_task_retries_a_slot_taken_meanwhile(app, client, user_id, monkeypatch):
+    from app import task_masks
+
+    assert client.post("/tasks/add-task", data={"task_type": "do", "task_text": "first"}).status_code == 302
+    # The next read of max(slot) is stale, as if another request had not committed yet
+    real_next_slot, calls = task_masks.next_slot, []
+
+    def stale_once(uid):
+        calls.append(uid)
+        return 0 if len(calls) == 1 else real_next_slot(uid)
+
+    monkeypatch.setattr(task_masks, "next_slot", stale_once)
+    assert client.post("/tasks/add-task", data={"task_type": "do", "task_text": "second"}).status_code == 302
+    assert len(calls) == 2
+    with app.app_context():
+        slots = db.session.execute(db.select(UserTask.task_text, UserTask.slot).order_by(UserTask.slot)).all()
+        assert [tuple(row) for row in slots] == [("first", 0), ("second", 1)]
+
+
+def test_parallel_add_task_gets_distinct_slots(app, user_id):
+    def add(i):
+        client = app.test_client()
+        login(client, user_id)
+        return client.post("/tasks/add-task", data={"task_type": "do", "task_text": f"task {i}"}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(add, range(16)))
+
+    assert statuses == [302] * 16
+    with app.app_context():
+        assert sorted(db.session.execute(db.select(UserTask.slot)).scalars()) == list(range(16))